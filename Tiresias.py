@@ -1,10 +1,10 @@
 # Author Josquin Debaz
 # GPL 3
 
-import urllib.request
 import re
 import time
 import webbrowser
+import multiprocessing
 import tkinter as tk
 from threading import Thread
 
@@ -24,6 +24,7 @@ import views.heatmap
 import views.capitals
 import views.openbooks
 import views.convert
+from utils.httpcache import get_http_cache
 
 
 def get_new_version():
@@ -46,8 +47,8 @@ def check_for_update():
 
 def get_last_on_remote():
     url = "https://raw.githubusercontent.com/josquindebaz/Tiresias/master/CHANGELOG.txt"
-    with urllib.request.urlopen(url) as page:
-        buf = page.read().decode()
+    # revalidated each time, downloaded only when changed
+    buf = get_http_cache().get(url, ttl=0).decode()
     return time.strptime(re.findall(r"\d{2}/\d{2}/\d{4}", buf)[0], "%d/%m/%Y")
 
 
@@ -211,6 +212,7 @@ class MainView(tk.Toplevel):
 
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
     root = tk.Tk()
     root.withdraw()
     app = MainView(root)
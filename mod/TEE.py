@@ -6,11 +6,12 @@
 import datetime
 import os
 import re
-import urllib.parse
-import urllib.request
 
 from bs4 import BeautifulSoup
 
+from utils.prosperonames import free_name
+from utils.httpcache import get_http_cache
+
 from cleaning import Cleaner
 
 
@@ -55,29 +56,10 @@ def formate_ctx(title, date, url):
     return "\r\n".join(ctx)
 
 
-def file_name(dest, date, prefix):
-    index, base = "A", 64
-    date = "".join(reversed(date.split("/")))
-    name = "%s%s%s" % (prefix, date, index)
-    path = os.path.join(dest, name + ".txt")
-    while os.path.isfile(path):
-        if ord(index[-1]) < 90:
-            index = chr(ord(index[-1]) + 1)
-        else:
-            base += 1
-            index = "A"
-        if base > 64:  # if Z => 2 letters
-            index = chr(base) + index
-        name = "%s%s%s" % (prefix, date, index)
-        path = os.path.join(dest, name + ".txt")
-    return name
-
-
 class ProcessArticle(object):
     def __init__(self, url):
         dest = "C:\\corpus\\EnergiCorpus\\FR\\TEE\\"
-        with urllib.request.urlopen(url) as page:
-            soup = BeautifulSoup(page, "lxml")
+        soup = BeautifulSoup(get_http_cache().get(url), "lxml")
         title = soup.title.string
         author = soup.find("div", "meta-author").text
         date = soup.find("div", "meta-date").text
@@ -94,13 +76,13 @@ class ProcessArticle(object):
         date = formate_date(date)
         ctx = formate_ctx(title, date, url)
 
-        ctx_cleaner = Cleaner(ctx.encode('utf-8'))
+        ctx_cleaner = Cleaner(ctx)
         ctx = ctx_cleaner.content.encode('latin-1', 'xmlcharrefreplace')  # to bytes
 
-        text_cleaner = Cleaner(content.encode('utf-8'))
+        text_cleaner = Cleaner(content)
         text = text_cleaner.content.encode('latin-1', 'xmlcharrefreplace')  # to bytes
 
-        filename = file_name(dest, date, "TEE")
+        filename = free_name(date, "TEE", dest)
 
         path = os.path.join(dest, filename + ".txt")
         with open(path, 'wb') as f:
@@ -143,8 +125,7 @@ class IndexNewArticles(object):
             list_file.write("\r\n".join(article_list))
 
     def get_page(self, url):
-        with urllib.request.urlopen(url) as page:
-            self.soup = BeautifulSoup(page, "lxml")
+        self.soup = BeautifulSoup(get_http_cache().get(url), "lxml")
 
     def get_articles(self):
         articles = []
@@ -185,8 +166,7 @@ class IndexArticles(object):
             list_file.write("\r\n".join(article_list))
 
     def get_page(self, url):
-        with urllib.request.urlopen(url) as page:
-            self.soup = BeautifulSoup(page, "lxml")
+        self.soup = BeautifulSoup(get_http_cache().get(url), "lxml")
 
     def get_next(self):
         for links in self.soup.find_all('a'):
@@ -5,17 +5,28 @@ GPL 3
 import os
 import re
 import html
+import json
+import codecs
+import hashlib
+import tempfile
+from collections import Counter
+from functools import lru_cache
 
+from utils.corpuswalker import iter_files, corpus_state_path, write_state
 
-def list_files(rep='.', exts=('.txt', '.TXT'), recursive=True, slash=False, repl=None):
-    """List files with txt or TXT extension"""
-    txt_files = []
-    for roots, _, files in os.walk('%s' % rep):
-        txt_files.extend([os.path.join(roots, file)
-                          for file in files
-                          if os.path.splitext(file)[1] in exts])
-        if not recursive:
-            break
+
+MANIFEST_NAME = "cleaning.json"
+# files larger than this are cleaned by chunks
+STREAM_SIZE = 64 << 20
+
+
+def list_files(rep='.', exts=('.txt', '.TXT'), recursive=True, slash=False, repl=None,
+               manifest=None, workers=None, snapshot=False):
+    """List files with txt or TXT extension,
+    without those a manifest knows as already cleaned"""
+    txt_files = list(iter_files(rep, exts, recursive, workers, snapshot))
+    if manifest:
+        txt_files = [path for path in txt_files if not manifest.is_clean(path)]
     if repl:
         txt_files = list(map(lambda x: x.replace(repl[0], repl[1]), txt_files))
     if slash:
@@ -23,53 +34,252 @@ def list_files(rep='.', exts=('.txt', '.TXT'), recursive=True, slash=False, repl
     return txt_files
 
 
+# {unknown ascii code: correct form,}
+ASCII_TO_REPLACE = {
+    12: "\n",
+    133: "...",
+    145: "'",
+    146: "'",
+    147: '"',
+    148: '"',
+    149: "-",
+    150: "-",
+    151: "-",
+    160: " ",
+    171: '" ',
+    173: "-",
+    180: "'",
+    183: "-",
+    186: '"',
+    187: ' "',
+    96: "'",
+    156: "oe",
+}
+
+NON_LATIN_MOTIF = re.compile("[^\x00-\xff]")
+
+ASCII_MOTIF = re.compile("[%s]" % "".join(re.escape(chr(code)) for code in ASCII_TO_REPLACE))
+
+# { "correct": ["incorrect 1,", "incorrect 2",],}
+CHARS_TO_REPLACE = {
+    "": ["&#65279;",
+         "&#8206;",
+         "&#61514;",
+         "&#61672;",
+         "&#61692;",
+         "&#61607;"],
+    "'": ["&rsquo;",
+          '&#8217;',
+          '&#8216;',
+          "&lsquo;"],
+    ' " ': ["&laquo;",
+            "&raquo;",
+            "&#8220;",
+            "&#8221;",
+            "&#8222;",
+            "&#171;",
+            "&#187;",
+            "&quot;",
+            "&lt;",
+            "&gt;",
+            "«",
+            '»'],
+    '... ': ["&hellip;",
+             "&#8230;",
+             "&#x2026;"
+             ],
+    "-": ["&#8211;",
+          "&#8208;",
+          "&sect;",
+          "&bull;",
+          "&#8209;",
+          "&#9658;",
+          "&#127809;",
+          "&#9688;",
+          "&#9033;"],
+    "\r\n": ["<br>",
+             "<br/>",
+             "<BR>",
+             "<BR/>",
+             '</br>',
+             '<th>',
+             "<BR />",
+             "<br />",
+             '<tr>',
+             "</p>",
+             "</th>",
+             "</ol>",
+             "</li>",
+             "&#8232;",
+             '<p />'],
+    "\r\n- ": ["<li>",
+               "<ol>"],
+    ' - ': ['&#8212;',
+            "&ndash;",
+            "&#61623;",
+            "&#61662;",
+            "&#8722;"],
+    " ": ["&nbsp;",
+          '&#xd;',
+          '#xd;',
+          "&#160;",
+          "&#176;",
+          "&#8201;",
+          "&#8203;",
+          "&#8239;",
+          "\xc2",
+          "&#128073;",
+          "&#8294;",
+          "&#8195;",
+          "&#8297;",
+          "&#8202;",
+          "&#8200;", ],
+    "oe": ["&oelig;",
+           "&#156;",
+           "&#339;",
+           "&#338;"],
+    "euros": ["&#8364;",
+              "&euro;",
+              "&#8364"],
+    "à": ["a&#768;", "&#257;"],
+    "À": ["A&#768;"],
+    "é": ["e&#769;",
+          "e\u0301"],
+    "É": ["E\u0301"],
+    "ê": ["e&#770;"],
+    "è": ["e&#768;"],
+    "â": ["a&#770;"],
+    "ô": ["o&#770;"],
+    "î": ["i&#770;"],
+    "ï": ["i&#776;"],
+    "ç": ["c&#807;"],
+    "û": ["u&#770;"],
+    "y": ["&#947;"],
+    "c": ["&#269;"],
+    "r": ["&#345;"],
+    ":)": ["&#128521;"],
+    ":(": ["&#128542;"],
+    "µ": ["&#956"],
+    "d": ["&#948;"],
+    "e": ["&#279;", "&#7497;"],
+    "@": ["&#8294;"],
+    "phi": ["&#966;"],
+    "°": ["&#730;"],
+}
+
+
+def trie_pattern(forms):
+    """Regex alternation of forms factorised as a trie, longest match first"""
+    trie = {}
+    for form in forms:
+        node = trie
+        for char in form:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else "(?:%s)" % "|".join(branches)
+        if "" in node:
+            pattern = "(?:%s)?" % pattern
+        return pattern
+
+    return build(trie)
+
+
+def compile_replacements(to_be_replaced):
+    """Compile all incorrect forms in one motif,
+    with a table giving the first correct form listed for each"""
+    table = {}
+    for correct, incorrects in to_be_replaced.items():
+        for incorrect in incorrects:
+            table.setdefault(incorrect, correct)
+    return re.compile(trie_pattern(table)), table
+
+
+CHARS_MOTIF, CHARS_TABLE = compile_replacements(CHARS_TO_REPLACE)
+
+
+# (option, log key, rule), in the order rules are applied after decoding
+RULES = (
+    ("a", 'ascii', "replace_ascii"),
+    ("c", 'chars', "char_replace"),
+    ("e", 'html characters', "unescape"),
+    ("s", 'split numbers', "splitted_numbers"),
+    ("h", 'hyphens', "hyphens"),
+    ("t", 'html tags', "html_tags"),
+    ("p", 'parity marks', "parity_marks"),
+    ("d", 'Dashes', "dash_with_punctuation"),
+    ("f", 'footnotes', "footnotes"),
+)
+
+DEFAULT_OPTIONS = "uasdhtpcef"
+
+SPLIT_NUMBER_MOTIF = re.compile(r"(\d)[ \.](\d{3})")
+DASH_AFTER_MOTIF = re.compile(r"-([\.,;!\?:'\(\)\[\]])")
+# .- is not processed because of firstname abrev like J.-P.
+DASH_BEFORE_MOTIF = re.compile(r"([,;!\?:'\(\)\[\]])-")
+HYPHEN_MOTIF = re.compile(r"-\s*[\r\n]{1,}")
+LISTED_TAGS = ['<i>', '</i>', '<em>', '</em>',
+               '<strong>', '</strong>',
+               '</tr>', '<td>', '</td>',
+               '&lt;i&gt;', '&lt;/i&gt;',
+               '&lt;/strong&gt;', '&lt;strong&gt;',
+               "<div>", "</div>", "<ul>", "</ul>",
+               "<p>", "<span>", "</span>",
+               "<b>", "</b>",
+               "<p align='center'>", '<p align="CENTER">',
+               '<center>', '</center>',
+               '</pre>',
+               ]
+LISTED_TAGS_MOTIF = re.compile(trie_pattern(LISTED_TAGS))
+# opening or closing unknown tag
+TAG_MOTIF = re.compile("<(/?)([a-z]*)>")
+SINGLE_TAG_MOTIF = re.compile(r"<[a-z]{1,} \S*>")
+LINK_MOTIF = re.compile("<a .*>(.*)</a>")
+# not i.e.
+PARITY_MOTIF = re.compile(r"([a-zé](?<!i))(\.e|-e|\(e\)|-ne|-rice|-euse)(\s|\.|-)")
+FOOTNOTE_MOTIF = re.compile(r'([A-Za-zé]{2,})(\d+)([.(,]) ')
+
+
 class Cleaner:
     """Convert bytes and clean string"""
 
-    def __init__(self, content, options="uasdhtpcef"):
+    def __init__(self, content, options=DEFAULT_OPTIONS):
+        if not isinstance(options, CleanerPipeline):
+            options = get_pipeline(options)
+
         self.content = content
         self.log = {}
 
-        if "u" in options:
-            if self.is_utf8():
+        if options.utf:
+            self.log['utf'] = self.decode_utf8()
+            if self.log['utf']:
                 self.utf_to_latin()
-                self.log['utf'] = 1
-            else:
-                self.log['utf'] = 0
-
-        self.content = self.content.decode('latin-1')  # byte to str
-
-        if "a" in options:
-            self.log['ascii'] = self.replace_ascii()
-        if "c" in options:
-            self.log['chars'] = self.char_replace()
-        if "e" in options:
-            self.log['html characters'] = self.unescape()
-        if "s" in options:
-            self.log['split numbers'] = self.splitted_numbers()
-        if "h" in options:
-            self.log['hyphens'] = self.hyphens()
-        if "t" in options:
-            self.log['html tags'] = self.html_tags()
-        if "p" in options:
-            self.log['parity marks'] = self.parity_marks()
-        if "d" in options:
-            self.log['Dashes'] = self.dash_with_punctuation()
-        if "f" in options:
-            self.log['footnotes'] = self.footnotes()
-
-    def is_utf8(self):
-        """Return True if utf-8"""
+        elif isinstance(self.content, bytes):
+            self.content = self.content.decode('latin-1')  # byte to str
+
+        for key, rule in options.rules:
+            self.log[key] = rule(self)
+
+    def decode_utf8(self):
+        """Decode bytes as utf-8, or as latin-1 if they are not,
+        return 1 if utf-8 (a str is taken as already decoded)"""
+        if isinstance(self.content, str):
+            return 1
         try:
-            self.content.decode('utf-8')
+            self.content = self.content.decode('utf-8')
         except UnicodeDecodeError:
-            return False
-        else:
-            return True
+            self.content = self.content.decode('latin-1')
+            return 0
+        return 1
 
     def utf_to_latin(self):
         """Convert utf to latin"""
-        txt_unicode = self.content.decode('utf-8')
+        txt_unicode = self.content
         txt_unicode = txt_unicode.replace('e\u0301', 'é')
         txt_unicode = txt_unicode.replace('E\u0301', 'É')
         txt_unicode = txt_unicode.replace('e\u0300', 'è')
@@ -77,153 +287,21 @@ class Cleaner:
         txt_unicode = txt_unicode.replace('a\u0300', 'à')
         txt_unicode = txt_unicode.replace('A\u0300', 'à'.upper())
         txt_unicode = txt_unicode.replace('u\u0300', 'ù')
-        self.content = txt_unicode.encode('latin-1', 'xmlcharrefreplace')
+        # as encoding in latin-1 with xmlcharrefreplace
+        self.content = NON_LATIN_MOTIF.sub(lambda match: "&#%d;" % ord(match.group()),
+                                           txt_unicode)
 
     def replace_ascii(self):
-        """{unknown ascii code: correct form,}"""
-        asciis = {
-            12: "\n",
-            133: "...",
-            145: "'",
-            146: "'",
-            147: '"',
-            148: '"',
-            149: "-",
-            150: "-",
-            151: "-",
-            160: " ",
-            171: '" ',
-            173: "-",
-            180: "'",
-            183: "-",
-            186: '"',
-            187: ' "',
-            96: "'",
-            156: "oe",
-        }
-        total = 0
-        for code, cor in asciis.items():
-            number = self.content.count(chr(code))
-            if number:
-                total += number
-                self.content = self.content.replace(chr(code), cor)
-        return total
+        """replace ASCII_TO_REPLACE, counted in a single scan"""
+        found = Counter(ASCII_MOTIF.findall(self.content))
+        for char in found:
+            self.content = self.content.replace(char, ASCII_TO_REPLACE[ord(char)])
+        return sum(found.values())
 
     def char_replace(self):
-        """{ "correct": ["incorrect 1,", "incorrect 2",],}"""
-        to_be_replaced = {
-            "": ["&#65279;",
-                 "&#8206;",
-                 "&#61514;",
-                 "&#61672;",
-                 "&#61692;",
-                 "&#61607;"],
-            "'": ["&rsquo;",
-                  '&#8217;',
-                  '&#8216;',
-                  "&lsquo;"],
-            ' " ': ["&laquo;",
-                    "&raquo;",
-                    "&#8220;",
-                    "&#8221;",
-                    "&#8222;",
-                    "&#171;",
-                    "&#187;",
-                    "&quot;",
-                    "&lt;",
-                    "&gt;",
-                    "«",
-                    '»'],
-            '... ': ["&hellip;",
-                     "&#8230;",
-                     "&#x2026;"
-                     ],
-            "-": ["&#8211;",
-                  "&#8208;",
-                  "&sect;",
-                  "&bull;",
-                  "&#8209;",
-                  "&#9658;",
-                  "&#127809;",
-                  "&#9688;",
-                  "&#9033;"],
-            "\r\n": ["<br>",
-                     "<br/>",
-                     "<BR>",
-                     "<BR/>",
-                     '</br>',
-                     '<th>',
-                     "<BR />",
-                     "<br />",
-                     '<tr>',
-                     "</p>",
-                     "</th>",
-                     "</ol>",
-                     "</li>",
-                     "&#8232;",
-                     '<p />'],
-            "\r\n- ": ["<li>",
-                       "<ol>"],
-            ' - ': ['&#8212;',
-                    "&ndash;",
-                    "&#61623;",
-                    "&#61662;",
-                    "&#8722;"],
-            " ": ["&nbsp;",
-                  '&#xd;',
-                  '#xd;',
-                  "&#160;",
-                  "&#176;",
-                  "&#8201;",
-                  "&#8203;",
-                  "&#8239;",
-                  "\xc2",
-                  "&#128073;",
-                  "&#8294;",
-                  "&#8195;",
-                  "&#8297;",
-                  "&#8202;",
-                  "&#8200;", ],
-            "oe": ["&oelig;",
-                   "&#156;",
-                   "&#339;",
-                   "&#338;"],
-            "euros": ["&#8364;",
-                      "&euro;",
-                      "&#8364"],
-            "à": ["a&#768;", "&#257;"],
-            "À": ["A&#768;"],
-            "é": ["e&#769;",
-                  "e\u0301"],
-            "É": ["E\u0301"],
-            "ê": ["e&#770;"],
-            "è": ["e&#768;"],
-            "â": ["a&#770;"],
-            "ô": ["o&#770;"],
-            "î": ["i&#770;"],
-            "ï": ["i&#776;"],
-            "ç": ["c&#807;"],
-            "û": ["u&#770;"],
-            "y": ["&#947;"],
-            "c": ["&#269;"],
-            "r": ["&#345;"],
-            ":)": ["&#128521;"],
-            ":(": ["&#128542;"],
-            "µ": ["&#956"],
-            "d": ["&#948;"],
-            "e": ["&#279;", "&#7497;"],
-            "@": ["&#8294;"],
-            "phi": ["&#966;"],
-            "°": ["&#730;"],
-        }
-
-        number = 0
-        for correcte, incorrectes in to_be_replaced.items():
-            for i in incorrectes:
-                cherche = self.content.count(i)
-                if cherche:
-                    self.content = self.content.replace(i, correcte)
-                    number += cherche
+        """replace CHARS_TO_REPLACE in one scan"""
+        self.content, number = CHARS_MOTIF.subn(lambda match: CHARS_TABLE[match.group()],
+                                                self.content)
         return number
 
     def unescape(self):
@@ -243,102 +321,293 @@ class Cleaner:
 
     def splitted_numbers(self):
         """strip splitted numbers"""
-        number = len(re.findall(r"\d[ \.]\d{3}", self.content))
-        if number:
-            self.content = re.sub(r"(\d)[ \.](\d{3})", "\\1\\2", self.content)
+        self.content, number = SPLIT_NUMBER_MOTIF.subn("\\1\\2", self.content)
         return number
 
     def dash_with_punctuation(self):
         """spacing dashes"""
-        after = re.compile(r"-([\.,;!\?:'\(\)\[\]])")
-        nafter = len(after.findall(self.content))
-        if nafter:
-            self.content = after.sub(" - \\1", self.content)
-
-        before = re.compile(r"([,;!\?:'\(\)\[\]])-")
-        # .- is not processed because of firstname abrev like J.-P.
-        nbefore = len(before.findall(self.content))
-        if nbefore:
-            self.content = before.sub("\\1 - ", self.content)
+        self.content, nafter = DASH_AFTER_MOTIF.subn(" - \\1", self.content)
+        self.content, nbefore = DASH_BEFORE_MOTIF.subn("\\1 - ", self.content)
 
         return nbefore + nafter
 
     def hyphens(self):
         """Strip hyphenations"""
-        motif = re.compile(r"-\s*[\r\n]{1,}")
-        number = len(motif.findall(self.content))
-        if number:
-            self.content = motif.sub("", self.content)
+        self.content, number = HYPHEN_MOTIF.subn("", self.content)
         return number
 
     def html_tags(self):
         """Delete html tags"""
-        tags = ['<i>', '</i>', '<em>', '</em>',
-                '<strong>', '</strong>',
-                '</tr>', '<td>', '</td>',
-                '&lt;i&gt;', '&lt;/i&gt;',
-                '&lt;/strong&gt;', '&lt;strong&gt;',
-                "<div>", "</div>", "<ul>", "</ul>",
-                "<p>", "<span>", "</span>",
-                "<b>", "</b>",
-                "<p align='center'>", '<p align="CENTER">',
-                '<center>', '</center>',
-                '</pre>',
-                ]
-        number = 0
         # delete tags from the list
-        for tag in tags:
-            tag_number = self.content.count(tag)
-            if tag_number:
-                self.content = self.content.replace(tag, "")
-                number += tag_number
+        self.content, number = LISTED_TAGS_MOTIF.subn("", self.content)
         # delete unknown even tags: <balise>bla bla</balise>
-        unlisted = re.findall("<([a-z]*)>", self.content)
-        if unlisted:
-            for balise in unlisted:
-                opening = re.findall("<%s>" % balise, self.content)
-                closing = re.findall("</%s>" % balise, self.content)
-                if len(opening) == len(closing):
-                    self.content = re.sub("<%s>" % balise, "", self.content)
-                    self.content = re.sub("</%s>" % balise, "", self.content)
-                    number += len(opening)
+        tally = Counter(TAG_MOTIF.findall(self.content))
+        balanced = {balise for closing, balise in tally
+                    if not closing and tally[("", balise)] == tally[("/", balise)]}
+        if balanced:
+            self.content = TAG_MOTIF.sub(lambda match: "" if match.group(2) in balanced
+                                         else match.group(), self.content)
+            number += sum(tally[("", balise)] for balise in balanced)
         # delete single tags: <tag something>
-        singles = re.findall(r"<[a-z]{1,} \S*>", self.content)
-        if singles:
-            number += len(singles)
-            self.content = re.sub(r"<[a-z]{1,} \S*>", "", self.content)
+        self.content, singles = SINGLE_TAG_MOTIF.subn("", self.content)
         # delete links: <a something>keep me</a>
-        links = re.findall("<a .*>(.*)</a>", self.content)
-        if links:
-            number += len(links)
-            self.content = re.sub("<a .*>(.*)</a>", "\\1", self.content)
+        self.content, links = LINK_MOTIF.subn("\\1", self.content)
+
+        number += singles + links
 
         return number
 
     def parity_marks(self):
         """Separate parity marks -e-s or (e)"""
-        # not i.e.
-        motif = re.compile(r"([a-zé](?<!i))(\.e|-e|\(e\)|-ne|-rice|-euse)(\s|\.|-)")
-        number = len(motif.findall(self.content))
-        if number:
-            self.content = motif.sub("\\1 \\2\\3", self.content)
+        self.content, number = PARITY_MOTIF.subn("\\1 \\2\\3", self.content)
         return number
 
     def footnotes(self):
         """Separate footnote calls"""
-        motif = re.compile(r'([A-Za-zé]{2,})(\d+)([.(,]) ')
-        number = len(motif.findall(self.content))
-        if number:
-            self.content = motif.sub("\\1 \\2 \\3 ", self.content)
+        self.content, number = FOOTNOTE_MOTIF.subn("\\1 \\2 \\3 ", self.content)
         return number
 
 
+class CleanerPipeline:
+    """Cleaning options compiled once, to be applied on many buffers"""
+
+    def __init__(self, options=DEFAULT_OPTIONS):
+        self.options = options
+        self.utf = "u" in options
+        self.rules = [(key, getattr(Cleaner, rule))
+                      for option, key, rule in RULES
+                      if option in options]
+
+    def clean(self, content):
+        """Return a Cleaner of the given bytes or str, with its content and log"""
+        return Cleaner(content, self)
+
+
+@lru_cache(maxsize=None)
+def get_pipeline(options=DEFAULT_OPTIONS):
+    """Return the pipeline shared by all cleanings with these options"""
+    return CleanerPipeline(options)
+
+
+def fingerprint(path, buf):
+    """(size, mtime, sha1) of a file whose content is buf"""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime, hashlib.sha1(buf).hexdigest()
+
+
+def clean_file(path, options=DEFAULT_OPTIONS, test=False):
+    """Clean a file in place unless testing, by chunks above STREAM_SIZE,
+    return the non zero log entries and the fingerprint of the cleaned file"""
+    if os.path.getsize(path) > STREAM_SIZE:
+        return clean_large_file(path, options, test)
+    with open(path, 'rb') as file:
+        buf = file.read()
+    cleaner = get_pipeline(options).clean(buf)
+    log = {key: value for key, value in cleaner.log.items() if value != 0}
+    if test:
+        return log, None
+    if log:
+        buf = bytes(cleaner.content, 'latin-1')
+        with open(path, 'wb') as file:
+            file.write(buf)
+    return log, fingerprint(path, buf)
+
+
+def clean_large_file(path, options=DEFAULT_OPTIONS, test=False):
+    """clean_file with a memory bounded by the chunk size"""
+    if test:
+        log = {}
+        for _ in clean_chunks(path, log, options):
+            pass
+        return {key: value for key, value in log.items() if value != 0}, None
+    digest = hashlib.sha1()
+    log = clean_stream(path, path, options, digest=digest)
+    stat = os.stat(path)
+    return ({key: value for key, value in log.items() if value != 0},
+            (stat.st_size, stat.st_mtime, digest.hexdigest()))
+
+
+def clean_files(paths, options=DEFAULT_OPTIONS, test=False):
+    """Clean a batch of files, return [(path, log, fingerprint),] in the given order"""
+    return [(path, *clean_file(path, options, test)) for path in paths]
+
+
+class CleaningManifest:
+    """Files of a corpus already cleaned, with the options used,
+    stored as json next to the corpus snapshot"""
+
+    def __init__(self, root, options=DEFAULT_OPTIONS):
+        self.root = root
+        self.options = options
+        self.path = corpus_state_path(root, MANIFEST_NAME)
+        self.entries = {}
+        self.load()
+
+    def load(self):
+        """Read the manifest file if any"""
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                self.entries = json.load(file)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        """Write the manifest file"""
+        write_state(self.path, json.dumps(self.entries, indent=0, sort_keys=True))
+
+    def key(self, path):
+        return os.path.relpath(path, self.root)
+
+    def is_clean(self, path):
+        """True if the file has not changed since cleaned with the same options"""
+        entry = self.entries.get(self.key(path))
+        if not entry or entry['options'] != self.options:
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        if stat.st_size != entry['size']:
+            return False
+        if stat.st_mtime == entry['mtime']:
+            return True
+        # touched but maybe unchanged
+        with open(path, 'rb') as file:
+            sha1 = hashlib.sha1(file.read()).hexdigest()
+        if sha1 != entry['sha1']:
+            return False
+        entry['mtime'] = stat.st_mtime
+        return True
+
+    def record(self, path, fingerprint):
+        """Remember a file as cleaned with the manifest options"""
+        size, mtime, sha1 = fingerprint
+        self.entries[self.key(path)] = {'size': size,
+                                        'mtime': mtime,
+                                        'sha1': sha1,
+                                        'options': self.options}
+
+
+def is_utf8_file(path, chunk_size=1 << 20):
+    """Return True if the whole file decodes as utf-8, read by chunks"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        with open(path, 'rb') as file:
+            for buf in iter(lambda: file.read(chunk_size), b""):
+                decoder.decode(buf)
+            decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def is_alnum(byte):
+    return 48 <= byte <= 57 or 65 <= byte <= 90 or 97 <= byte <= 122
+
+
+SPACE_BYTES = frozenset(b" \t\r\n\x0b\x0c")
+# no rule joins a line ending with these to the next one
+LINE_END_BYTES = frozenset(byte for byte in range(128) if is_alnum(byte)) | frozenset(b".,!?")
+# bytes before the end of a buffer where a cut is looked for
+CUT_WINDOW = 1 << 16
+
+
+def cut_point(buf, window=CUT_WINDOW):
+    """Index after a newline, in the last window bytes, where no rule can
+    match across: between a line ending with a letter, a digit or a
+    sentence punctuation and a line beginning with a letter or a digit.
+    Without any, cut after the last newline or space"""
+    low = max(0, len(buf) - window)
+    end = buf.rfind(b"\n", low, len(buf) - 1)
+    while end > low:
+        if is_alnum(buf[end + 1]):
+            before = end - 1
+            while before > low and buf[before] in SPACE_BYTES:
+                before -= 1
+            if buf[before] in LINE_END_BYTES:
+                return end + 1
+        end = buf.rfind(b"\n", low, end)
+    for separator in (b"\n", b" "):
+        end = buf.rfind(separator)
+        if end > 0:
+            return end + 1
+    # a single word, do not split an utf-8 character
+    end = len(buf)
+    while end > 1 and 0x80 <= buf[end - 1] <= 0xbf:
+        end -= 1
+    if buf[end - 1] >= 0xc0:
+        end -= 1
+    return end or len(buf)
+
+
+def merge_logs(total, log):
+    """Add the log of a chunk to the log of the file"""
+    for key, value in log.items():
+        previous = total.get(key, 0)
+        if key == 'utf':
+            total[key] = max(previous, value)
+        elif isinstance(value, str) or isinstance(previous, str):
+            # html characters: keep a skipping error, else done
+            if not (isinstance(previous, str) and previous.startswith("Skipped")):
+                total[key] = value or previous
+        else:
+            total[key] = previous + value
+    return total
+
+
+def clean_chunks(source, log, options=DEFAULT_OPTIONS, chunk_size=1 << 20):
+    """Yield the cleaned bytes of a file by chunks of about chunk_size bytes,
+    cut between lines so that no rule matches across, merging their logs
+    into log: balanced unknown tags (<x>..</x>) are counted chunk by chunk,
+    and html unescaping is skipped only for the chunks where it fails"""
+    if "u" in options:
+        utf = is_utf8_file(source, chunk_size)
+        log['utf'] = int(utf)
+        if not utf:
+            options = options.replace("u", "")
+    pipeline = get_pipeline(options)
+
+    with open(source, 'rb') as src:
+        rest = b""
+        while True:
+            buf = src.read(chunk_size)
+            buf, end = rest + buf, not buf
+            if not buf:
+                break
+            cut = len(buf) if end else cut_point(buf)
+            buf, rest = buf[:cut], buf[cut:]
+            cleaner = pipeline.clean(buf)
+            merge_logs(log, cleaner.log)
+            yield bytes(cleaner.content, 'latin-1')
+
+
+def clean_stream(source, destination, options=DEFAULT_OPTIONS, chunk_size=1 << 20, digest=None):
+    """Clean a file by chunks of about chunk_size bytes,
+    writing incrementally to destination, which may be the source,
+    and updating digest, a hashlib object, if given.
+    Return the merged log"""
+    log = {}
+    directory = os.path.dirname(os.path.abspath(destination))
+    handle, temp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(handle, 'wb') as dst:
+            for buf in clean_chunks(source, log, options, chunk_size):
+                dst.write(buf)
+                if digest is not None:
+                    digest.update(buf)
+        os.replace(temp, destination)
+    except BaseException:
+        os.remove(temp)
+        raise
+    return log
+
+
 if __name__ == '__main__':
     for txt in list_files(os.getcwd()):
         print(txt)
         with open(txt, 'rb') as f:
             buf = f.read()
-        C = Cleaner(buf, "uasdhtpcef")
+        C = get_pipeline().clean(buf)
         print(C.log)
         buf = bytes(C.content, 'latin-1')
         with open(txt, 'wb') as f:
@@ -12,6 +12,8 @@ import datetime
 import csv
 import pandas as pd
 
+from utils.prosperonames import ProsperoNameAllocator
+
 try:
     import cleaning
 except:
@@ -61,23 +63,39 @@ def format_date(date):
         return "00/00/0000"
 
 
-def file_name(date, prefix, save_dir):
-    """return a name in Prospero style"""
-    index, base = "A", 64
-    date = "".join(reversed(date.split("/")))
-    name = "%s%s%s" % (prefix, date, index)
-    path = os.path.join(save_dir, name + ".txt")
-    while os.path.isfile(path):
-        if ord(index[-1]) < 90:
-            index = chr(ord(index[-1]) + 1)
-        else:
-            base += 1
-            index = "A"
-        if base > 64:  # if Z => 2 letters
-            index = chr(base) + index
-        name = "%s%s%s" % (prefix, date, index)
-        path = os.path.join(save_dir, name + ".txt")
-    return name
+TITLE_TAG_MOTIF = re.compile(r'<(b|span) class=["\'][a-z]{2}Headline')
+DIV_DATE_MOTIF = re.compile(r"\d{1,2}\s+[a-zéèûñíáóúüãçA-Z]*\s+\d{4}</div>")
+TD_DATE_MOTIF = re.compile(r"<td>(\d{1,2}\s+[a-zéèûñíáóúüãçA-Z]*\s+\d{4})</td>")
+TIME_MOTIF = re.compile(r"\d{2}:\d{2}</div>")
+FIELD_CODES = ["CLM", "SE", "HD", "BY", "CR", "WC", "PD", "SN", "SC", "ED", "PG", "LA", "CY", "LP", "TD", "ART",
+               "CO", "IN", "NS", "RE", "IPC", "IPD", "PUB", "AN"]
+FIELD_MOTIF = re.compile(r"<b>(%s)</b>&nbsp;</td><td>" % "|".join(FIELD_CODES))
+FIELD_TAGS_MOTIFS = [re.compile(r"</?b>"), re.compile(r"</?span[^>]*>"),
+                     re.compile(r"</?font[^>]*>"), re.compile(r"<br[^>]*>")]
+PARAGRAPH_MOTIFS = [re.compile('<p class="articleParagraph [a-z]{2}articleParagraph" >'),
+                    re.compile('<p class="articleParagraph [a-z]{2}articleParagraph">')]
+LEADING_NEWLINE_MOTIF = re.compile(r"^(\r\n|\n)\s*")
+NEWLINE_MOTIF = re.compile(r"\s*(\r\n|\n)\s*")
+BOLD_MOTIF = re.compile(r"</?b>")
+SPAN_MOTIF = re.compile(r"</?span[^>]*>")
+
+
+def table_fields(div):
+    """value of each field code of a Factiva metadata table, in one scan"""
+    fields = dict.fromkeys(FIELD_CODES, "")
+    found = set()
+    for match in FIELD_MOTIF.finditer(div):
+        code = match.group(1)
+        if code in found:
+            continue
+        found.add(code)
+        value = div[match.end():].split("</td></tr>", 1)[0]
+        value = str(value).strip()
+        value = value.replace("<br/>", "").replace("</span>", "")
+        for motif in FIELD_TAGS_MOTIFS:
+            value = motif.sub("", value)
+        fields[code] = value
+    return fields
 
 
 def parse(article):
@@ -85,8 +103,7 @@ def parse(article):
     result = {}
     # get title
     try:
-        tag = re.search(r'<(b|span) class=["\'][a-z]{2}Headline',
-                        article).group(1)
+        tag = TITLE_TAG_MOTIF.search(article).group(1)
         title = get(article,
                     '<%s class=["\'][a-z]{2}Headline["\']>' % tag,
                     '</%s>' % tag)
@@ -97,45 +114,32 @@ def parse(article):
     except:
         result['title'] = "Title problem"
     # remove <b> and </b>
-    result['title'] = re.sub(r"</?b>", "", result['title'])
+    result['title'] = BOLD_MOTIF.sub("", result['title'])
     # get date and support
-    divs = re.split('<div>', article)
-    form1 = re.compile(r"\d{1,2}\s+[a-zéèûñíáóúüãçA-Z]*\s+\d{4}</div>")
-    form2 = re.compile(r"<td>(\d{1,2}\s+[a-zéèûñíáóúüãçA-Z]*\s+\d{4})</td>")
-    c = 0
-    for div in divs:
-
-        chaves = ["CLM", "SE", "HD", "BY", "CR", "WC", "PD", "SN", "SC", "ED", "PG", "LA", "CY", "LP", "TD", "ART",
-                  "CO", "IN", "NS", "RE", "IPC", "IPD", "PUB", "AN"]
-        for chave in chaves:
-            div_name = f"<b>{chave}</b>&nbsp;</td><td>"
-            if div_name in div:
-                v = get(div, div_name, "</td></tr>")
-                v = str(v).strip()
-                v = v.replace("<br/>", "").replace("</span>", "")
-                v = re.sub(r"</?b>", "", v)
-                v = re.sub(r"</?span[^>]*>", "", v)
-                v = re.sub(r"</?font[^>]*>", "", v)
-                v = re.sub(r"<br[^>]*>", "", v)
-                result[chave] = v
-            else:
-                result[chave] = ""
-
-        if form1.search(div):
+    divs = article.split('<div>')
+    # each div rewrote all the fields, the last one stays
+    result.update(table_fields(divs[-1]))
+    table_media = None
+    for index, div in enumerate(divs):
+        if DIV_DATE_MOTIF.search(div):
             result['date'] = div[:-6]
-            if re.search(r"\d{2}:\d{2}</div>", divs[divs.index(div) + 1]):
+            if TIME_MOTIF.search(divs[index + 1]):
                 result['time'] = u"REF_HEURE:%s" % div[:-6]
-                result['media'] = divs[divs.index(div) + 2][:-6]
+                result['media'] = divs[index + 2][:-6]
             else:
-                result['media'] = divs[divs.index(div) + 1][:-6]
-        elif form2.search(div):
-            result['date'] = form2.search(div).group(1)
-            result['media'] = get(article,
-                                  '<b>SN</b>&nbsp;</td><td>',
-                                  '</td>')
+                result['media'] = divs[index + 1][:-6]
         else:
-            result['date'] = result["PD"]
-            result['media'] = result["SN"]
+            found = TD_DATE_MOTIF.search(div)
+            if found:
+                result['date'] = found.group(1)
+                if table_media is None:
+                    table_media = get(article,
+                                      '<b>SN</b>&nbsp;</td><td>',
+                                      '</td>')
+                result['media'] = table_media
+            else:
+                result['date'] = result["PD"]
+                result['media'] = result["SN"]
     # format date
 
     result['date'] = format_date(result['date'])
@@ -147,28 +151,27 @@ def parse(article):
     except:
         pass
 
-    paragraphs = re.split('<p class="articleParagraph [a-z]{2}\
-articleParagraph" >', article)[1:]
+    paragraphs = PARAGRAPH_MOTIFS[0].split(article)[1:]
     if not paragraphs:
-        paragraphs = re.split('<p class="articleParagraph [a-z]{2}\
-articleParagraph">', article)[1:]
+        paragraphs = PARAGRAPH_MOTIFS[1].split(article)[1:]
     # get text content
-    result['text'] = result['title'] + "\r\n.\r\n" + "LP: "
+    text = [result['title'] + "\r\n.\r\n" + "LP: "]
 
     for idx, paragraph in enumerate(paragraphs):
         p = paragraph
-        paragraph = re.split("</p>", paragraph)[0]
-        paragraph = re.sub(r"^(\r\n|\n)\s*", "", paragraph)
-        paragraph = re.sub(r"\s*(\r\n|\n)\s*", " ", paragraph)
-        paragraph = re.sub(r"</?b>", "", paragraph)  # remove <b> and </b>
+        paragraph = paragraph.partition("</p>")[0]
+        paragraph = LEADING_NEWLINE_MOTIF.sub("", paragraph)
+        paragraph = NEWLINE_MOTIF.sub(" ", paragraph)
+        paragraph = BOLD_MOTIF.sub("", paragraph)  # remove <b> and </b>
         # removendo span
-        paragraph = re.sub(r"</?span[^>]*>", "", paragraph)
+        paragraph = SPAN_MOTIF.sub("", paragraph)
         lp = p if "</td><td>" in p else ""
         if lp:
             if idx < len(paragraphs) - 1:
                 result["LP"] = paragraph
                 paragraph = paragraph + "\r\n" + "TD: "
-        result['text'] += paragraph
+        text.append(paragraph)
+    result['text'] = "".join(text)
     texto = str(str(result['text']).split('LP:')[1]).split('TD:')
     result["LP"] = texto[0]
     result["TD"] = texto[1]
@@ -212,10 +215,9 @@ class ParseCsv:
     def write_prospero_files(self, save_dir=".", cleaning=False):
         """for each article, write txt, csv and ctx in a given directory"""
 
+        allocator = ProsperoNameAllocator(save_dir)
         for _, row in self.content.iterrows():
-            filepath = file_name(str(row['PD']).replace('/', ''),
-                                 "FACTIVA",
-                                 save_dir)
+            filepath = allocator.name(str(row['PD']).replace('/', ''), "FACTIVA")
             path = os.path.join(save_dir, filepath + ".txt")
 
             with open(path, 'wb') as file:
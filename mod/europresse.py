@@ -1,14 +1,16 @@
 import datetime
+import hashlib
 import html
 import os
 import re
 
-from utils.supportpublimanager import SupportPubliManager
+from utils.supportpublimanager import get_support_publi
+from utils.prosperonames import free_name
 
 try:
-    from cleaning import Cleaner
+    from cleaning import get_pipeline
 except ModuleNotFoundError:
-    from mod.cleaning import Cleaner
+    from mod.cleaning import get_pipeline
 
 
 def format_support_name(support):
@@ -16,21 +18,46 @@ def format_support_name(support):
     return motif.sub('', support)
 
 
-def strip_tags_with_class(text):
-    motif = re.compile(r'(<(\S+) class=(.))')
-
-    if not motif.search(text):
-        return text
+# a tag, its name and what follows the name
+TAG_MOTIF = re.compile(r"<(/?)([^\s<>/]+)((?:[\s/][^<>]*)?)>")
 
-    while motif.search(text):
-        catches = motif.split(text, 1)
-        to_keep = re.split(f"{catches[3]}>", catches[4], 1)[1]
-        to_keep = re.sub(f"</{catches[2]}>", "", to_keep, 1)
-        text = catches[0] + to_keep
 
-    text = re.sub("</*mark>", "", text)
-
-    return text
+def strip_tags_with_class(text):
+    """Delete the tags whose first attribute is a class, with their closing
+    tags, in one pass over the tags; mark tags go with them"""
+    pieces = []
+    kept = 0
+    stripped_any = False
+    # open tags as (name, stripped), and how many are open for each name
+    stack = []
+    opened = {}
+    for tag in TAG_MOTIF.finditer(text):
+        closing, name, rest = tag.groups()
+        if name == "mark":
+            stripped = True
+        elif not closing:
+            stripped = rest.startswith(" class=")
+            if not rest.endswith("/"):
+                stack.append((name, stripped))
+                opened[name] = opened.get(name, 0) + 1
+        elif opened.get(name):
+            # close what was left open inside, as a browser would
+            open_name = None
+            while open_name != name:
+                open_name, stripped = stack.pop()
+                opened[open_name] -= 1
+        else:
+            stripped = False
+        if stripped:
+            stripped_any = stripped_any or name != "mark"
+            pieces.append(text[kept:tag.start()])
+            kept = tag.end()
+
+    # marks are only dropped from a text with tags with class
+    if not stripped_any:
+        return text
+    pieces.append(text[kept:])
+    return "".join(pieces)
 
 
 def fetch_date(given_date):
@@ -106,26 +133,91 @@ def in_tag(html_source, tag_class):
     return closing[0].strip()
 
 
+HEADER_CLASSES = ("DocPublicationName", "DocHeader", "titreArticle", "docAuthors")
+HEADER_MOTIF = re.compile(r'<(\S*) \S*=[\'"](%s)[\'"][^>]*>' % "|".join(HEADER_CLASSES))
+SUBTITLE_MOTIF = re.compile("<b><p>(.*)</p></b>")
+# as html.unescape finds them
+ENTITY_MOTIF = re.compile(r'&(#[0-9]+;?|#[xX][0-9a-fA-F]+;?|[^\t\n\f <&#;]{1,32};?)')
+
+
 def get_header_infos(header):
+    fields = {tag_class: in_tag(header, tag_class) for tag_class in HEADER_CLASSES}
+
+    fields["subtitle"] = False
+    if SUBTITLE_MOTIF.search(header):
+        fields["subtitle"] = SUBTITLE_MOTIF.search(header).group(1)
+
+    return format_header_infos(fields)
+
+
+def read_raw_header(raw_header):
+    """get_header_infos of the unescaped header, unescaping only the fields,
+    found in one scan"""
+    found = {}
+    for match in HEADER_MOTIF.finditer(raw_header):
+        found.setdefault(match.group(2), []).append(match)
+
+    fields = {}
+    for tag_class in HEADER_CLASSES:
+        fields[tag_class] = False
+        # as in_tag, the class must be there once
+        if len(found.get(tag_class, [])) == 1:
+            match = found[tag_class][0]
+            closing = re.compile("</%s>" % match.group(1)).search(raw_header, match.end())
+            if closing:
+                fields[tag_class] = html.unescape(raw_header[match.end():closing.start()]).strip()
+
+    fields["subtitle"] = False
+    subtitle = SUBTITLE_MOTIF.search(raw_header)
+    if subtitle:
+        fields["subtitle"] = html.unescape(subtitle.group(1))
+
+    return format_header_infos(fields)
+
+
+def entities_keep_tags(raw_header):
+    """True if unescaping the header cannot change what the header motifs find:
+    no entity gives a tag character, or a space, slash, letter or digit inside
+    a tag, or a quote after = or a class name"""
+    for match in ENTITY_MOTIF.finditer(raw_header):
+        entity = match.group()
+        text = html.unescape(entity)
+        if text == entity:
+            continue
+        if any(char in "<>=\n" for char in text):
+            return False
+        if any(char.isspace() or char == "/" or (char.isascii() and char.isalnum())
+               for char in text):
+            start, end = match.span()
+            while start and not raw_header[start - 1].isspace():
+                start -= 1
+            while end < len(raw_header) and not raw_header[end].isspace():
+                end += 1
+            if "<" in raw_header[start:end] or ">" in raw_header[start:end]:
+                return False
+        if any(char in "'\"" for char in text) and \
+                raw_header.endswith(("=",) + HEADER_CLASSES, 0, match.start()):
+            return False
+    return True
+
+
+def format_header_infos(fields):
     infos = {}
 
-    publication_name = in_tag(header, "DocPublicationName")
+    publication_name = fields["DocPublicationName"]
     infos["source"] = format_support_name(publication_name)
 
-    infos["date"] = fetch_date(in_tag(header, "DocHeader"))
+    infos["date"] = fetch_date(fields["DocHeader"])
 
-    title = in_tag(header, "titreArticle")
+    title = fields["titreArticle"]
     title = strip_tags_with_class(title)
     title = re.sub(r"\s+", " ", title)
     title = title.strip()
     infos["title"] = strip_tags_with_class(title)
 
-    infos["narrator"] = in_tag(header, "docAuthors")
+    infos["narrator"] = fields["docAuthors"]
 
-    infos["subtitle"] = False
-    m_subtitle = re.compile("<b><p>(.*)</p></b>")
-    if m_subtitle.search(header):
-        infos["subtitle"] = m_subtitle.search(header).group(1)
+    infos["subtitle"] = fields["subtitle"]
 
     return infos
 
@@ -153,10 +245,14 @@ class EuropresseArticleParser:
             self.parse_article(article)
 
     def parse_article(self, raw_article):
-        article_content = html.unescape(raw_article)
-        header, body = re.split('</header>', article_content)
-
-        self.result = get_header_infos(header)
+        parts = raw_article.split('</header>')
+        body = html.unescape(parts[1]) if len(parts) == 2 else ""
+        if len(parts) == 2 and '</header>' not in body and entities_keep_tags(parts[0]):
+            self.result = read_raw_header(parts[0])
+        else:
+            article_content = html.unescape(raw_article)
+            header, body = re.split('</header>', article_content)
+            self.result = get_header_infos(header)
 
         text = in_tag(body, "docOcurrContainer")
         self.result["text"] = strip_tags_with_class(text)
@@ -166,34 +262,78 @@ class EuropresseArticleParser:
         return self.result
 
 
-def read_file(filename):
-    with open(filename, 'rb') as file_pointer:
-        buffer = file_pointer.read().decode('utf-8')
-    return buffer
+ARTICLE_SEPARATOR = '<article>'
+CHUNK_SIZE = 1 << 20
 
 
-def separate_articles(buffer):
-    return re.split('<article>', buffer)[1:]
+def iter_raw_articles(filename, chunk_size=CHUNK_SIZE):
+    """yield the text following each <article>, reading the file by chunks"""
+    with open(filename, 'r', encoding='utf-8', newline='') as file_pointer:
+        pending = ""
+        started = False
+        for chunk in iter(lambda: file_pointer.read(chunk_size), ""):
+            search_from = max(len(pending) - len(ARTICLE_SEPARATOR) + 1, 0)
+            pending += chunk
+            index = pending.find(ARTICLE_SEPARATOR, search_from)
+            while index >= 0:
+                if started:
+                    yield pending[:index]
+                started = True
+                pending = pending[index + len(ARTICLE_SEPARATOR):]
+                index = pending.find(ARTICLE_SEPARATOR)
+            if not started:
+                # only what could begin a separator
+                pending = pending[-len(ARTICLE_SEPARATOR) + 1:]
+        if started:
+            yield pending
 
 
-class EuropresseHtmlParser(object):
-    def __init__(self, filename):
+def parse_raw_article(raw_article):
+    return EuropresseArticleParser(raw_article).get_result
 
-        self.parsed_articles = []
 
-        buffer = read_file(filename)
+def iter_articles(filename):
+    """yield the parsed articles of an export one at a time"""
+    for raw_article in iter_raw_articles(filename):
+        parsed = parse_raw_article(raw_article)
+        if parsed:
+            yield parsed
 
-        self.articles = separate_articles(buffer)
 
-        for article in self.articles:
-            article_parser = EuropresseArticleParser(article)
-            parsed = article_parser.get_result
-            if parsed:
-                self.parsed_articles.append(parsed)
+def parse_export(filename):
+    """all parsed articles of an export, for worker processes"""
+    return list(iter_articles(filename))
+
+
+def try_parse_export(filename):
+    """all parsed articles of an export, None when it cannot be parsed
+    to its end, so that nothing is kept from a broken export"""
+    try:
+        return parse_export(filename)
+    except Exception:
+        return None
+
+
+def article_fingerprint(article):
+    """(source, date, title, text hash) of a parsed article,
+    whitespace being normalized, to find it again across exports"""
+    text = " ".join(str(article["text"]).split())
+    return (article["source"],
+            article["date"],
+            " ".join(str(article["title"]).split()),
+            hashlib.sha1(text.encode("utf-8")).hexdigest())
+
+
+class EuropresseHtmlParser(object):
+    def __init__(self, filename):
+
+        self.articles = list(iter_raw_articles(filename))
+
+        self.parsed_articles = [parsed for parsed in map(parse_raw_article, self.articles) if parsed]
 
 
 def fetch_publication_infos(publication):
-    publication_index = SupportPubliManager()
+    publication_index = get_support_publi()
 
     if publication not in publication_index.codex.keys():
         return "EUROPRESSE", publication, "unknown source"
@@ -206,26 +346,7 @@ def fetch_publication_infos(publication):
 
 
 def name_file(formatted_date, prefix, destination):
-    index, base = "A", 64
-    formatted_date = "".join(reversed(formatted_date.split("/")))
-    name = "%s%s%s" % (prefix, formatted_date, index)
-
-    path = os.path.join(destination, name + ".txt")
-
-    while os.path.isfile(path):
-        if ord(index[-1]) < 90:
-            index = chr(ord(index[-1]) + 1)
-        else:
-            base += 1
-            index = "A"
-
-        if base > 64:  # if index is Z => add a letter
-            index = chr(base) + index
-
-        name = "%s%s%s" % (prefix, formatted_date, index)
-        path = os.path.join(destination, name + ".txt")
-
-    return name
+    return free_name(formatted_date, prefix, destination)
 
 
 def create_txt_content(article):
@@ -270,17 +391,21 @@ def clean_content(cleaning_required, ctx_content, txt_content):
     if not cleaning_required:
         return ctx_content, txt_content
 
-    txt_cleaner = Cleaner(txt_content.encode('utf-8'))
-    ctx_cleaner = Cleaner(ctx_content.encode('utf-8'))
+    pipeline = get_pipeline()
+    txt_cleaner = pipeline.clean(txt_content)
+    ctx_cleaner = pipeline.clean(ctx_content)
 
     return ctx_cleaner.content, txt_cleaner.content
 
 
 class EuropresseProsperoFileWriter(object):
-    def __init__(self, article, destination, cleaning_required=True):
+    def __init__(self, article, destination, cleaning_required=True, allocator=None):
 
         prefix, source, source_type = fetch_publication_infos(article['source'])
-        self.filename = name_file(article['date'], prefix, destination)
+        if allocator:
+            self.filename = allocator.name(article['date'], prefix)
+        else:
+            self.filename = name_file(article['date'], prefix, destination)
 
         txt_content = create_txt_content(article)
         ctx_content = create_ctx_content(article, source, source_type)
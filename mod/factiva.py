@@ -6,9 +6,12 @@ GNU General Public License
 import re
 import os
 import glob
-import random
 import datetime
 
+from utils.supportpublimanager import get_support_publi
+from utils.prosperonames import ProsperoNameAllocator
+from utils.article import Article, assign_supports
+
 try:
     import cleaning
 except ModuleNotFoundError:
@@ -58,23 +61,14 @@ def format_date(date):
         return "00/00/0000"
 
 
-def file_name(date, prefix, save_dir):
-    """return a name in Prospero style"""
-    index, base = "A", 64
-    date = "".join(reversed(date.split("/")))
-    name = "%s%s%s" % (prefix, date, index)
-    path = os.path.join(save_dir, name + ".txt")
-    while os.path.isfile(path):
-        if ord(index[-1]) < 90:
-            index = chr(ord(index[-1]) + 1)
-        else:
-            base += 1
-            index = "A"
-        if base > 64:  # if Z => 2 letters
-            index = chr(base) + index
-        name = "%s%s%s" % (prefix, date, index)
-        path = os.path.join(save_dir, name + ".txt")
-    return name
+TITLE_TAG_MOTIF = re.compile(r'<(b|span) class=["\'][a-z]{2}Headline')
+DIV_DATE_MOTIF = re.compile(r"\d{1,2}\s+[a-zéèûñíáóúüãçA-Z]*\s+\d{4}</div>")
+TD_DATE_MOTIF = re.compile(r"<td>(\d{1,2}\s+[a-zéèûñíáóúüãçA-Z]*\s+\d{4})</td>")
+TIME_MOTIF = re.compile(r"\d{2}:\d{2}</div>")
+PARAGRAPH_MOTIF = re.compile(r'<p class="articleParagraph\s+[a-z]{2}articleParagraph"\s*>')
+LEADING_NEWLINE_MOTIF = re.compile(r"^(\r\n|\n)\s*")
+NEWLINE_MOTIF = re.compile(r"\s*(\r\n|\n)\s*")
+BOLD_MOTIF = re.compile(r"</?b>")
 
 
 def parse(article):
@@ -82,34 +76,33 @@ def parse(article):
     result = {}
     # get title
     try:
-        tag = re.search(r'<(b|span) class=["\'][a-z]{2}Headline',
-                        article).group(1)
+        tag = TITLE_TAG_MOTIF.search(article).group(1)
         title = get(article,
                     '<%s class=["\'][a-z]{2}Headline["\']>' % tag,
                     '</%s>' % tag)
-        result['title'] = re.sub(r"^(\r\n|\n)\s*", "", title)
+        result['title'] = LEADING_NEWLINE_MOTIF.sub("", title)
     except:
         result['title'] = "Title problem"
     # remove <b> and </b>
-    result['title'] = re.sub(r"</?b>", "", result['title'])
+    result['title'] = BOLD_MOTIF.sub("", result['title'])
 
     # get date and support
-    divs = re.split('<div>', article)
-    form1 = re.compile(r"\d{1,2}\s+[a-zéèûñíáóúüãçA-Z]*\s+\d{4}</div>")
-    form2 = re.compile(r"<td>(\d{1,2}\s+[a-zéèûñíáóúüãçA-Z]*\s+\d{4})</td>")
-    for div in divs:
-        if form1.search(div):
+    divs = article.split('<div>')
+    for index, div in enumerate(divs):
+        if DIV_DATE_MOTIF.search(div):
             result['date'] = div[:-6]
-            if re.search(r"\d{2}:\d{2}</div>", divs[divs.index(div) + 1]):
+            if TIME_MOTIF.search(divs[index + 1]):
                 result['time'] = u"REF_HEURE:%s" % div[:-6]
-                result['media'] = divs[divs.index(div) + 2][:-6]
+                result['media'] = divs[index + 2][:-6]
             else:
-                result['media'] = divs[divs.index(div) + 1][:-6]
-        elif form2.search(div):
-            result['date'] = form2.search(div).group(1)
-            result['media'] = get(article,
-                                  '<b>SN</b>&nbsp;</td><td>',
-                                  '</td>')
+                result['media'] = divs[index + 1][:-6]
+        else:
+            found = TD_DATE_MOTIF.search(div)
+            if found:
+                result['date'] = found.group(1)
+                result['media'] = get(article,
+                                      '<b>SN</b>&nbsp;</td><td>',
+                                      '</td>')
     # format date
     result['date'] = format_date(result['date'])
 
@@ -122,16 +115,14 @@ def parse(article):
         pass
 
     # get text content
-    result['text'] = result['title'] + "\r\n.\r\n"
-
-    paragraphs = re.split(r'<p class="articleParagraph\s+[a-z]{2}articleParagraph"\s*>', article)
-
-    for paragraph in paragraphs[1:]:
-        paragraph = re.split("</p>", paragraph)[0]
-        paragraph = re.sub(r"^(\r\n|\n)\s*", "", paragraph)
-        paragraph = re.sub(r"\s*(\r\n|\n)\s*", " ", paragraph)
-        paragraph = re.sub(r"</?b>", "", paragraph)  # remove <b> and </b>
-        result['text'] += paragraph
+    text = [result['title'], "\r\n.\r\n"]
+    for paragraph in PARAGRAPH_MOTIF.split(article)[1:]:
+        paragraph = paragraph.partition("</p>")[0]
+        paragraph = LEADING_NEWLINE_MOTIF.sub("", paragraph)
+        paragraph = NEWLINE_MOTIF.sub(" ", paragraph)
+        paragraph = BOLD_MOTIF.sub("", paragraph)  # remove <b> and </b>
+        text.append(paragraph)
+    result['text'] = "".join(text)
 
     return result
 
@@ -140,67 +131,42 @@ class ParseHtm:
     """from htm of Wactiva to Prospero"""
 
     def __init__(self, fname):
-        self.articles = {}
         self.unknowns = []
         with open(fname, 'rb') as file:
             buf = file.read()
             buf = buf.decode('utf-8')  # byte to str
         self.content = re.split(' class="article [a-z]{2}Article">',
                                 buf)[1:]
-        for article in self.content:
-            id_article = random.randint(0, 1000000)
-            while id_article in self.articles.keys():
-                id_article = random.randint(0, 1000000)
-            self.articles[id_article] = parse(article)
+        self.articles = [Article(**parse(article)) for article in self.content]
 
     def get_supports(self, fname):
         """parse supports.publi and find correspondences"""
-        medias = {}
-        with open(fname, 'rb') as file:
-            buf = file.read()
-            buf = buf.decode('cp1252')  # byte to str
-            lines = re.split("\r*\n", buf)
-        for line in lines:
-            media = re.split('; ', line)
-            if media:
-                medias[media[0]] = media[1:]
-
-        for key, article in self.articles.items():
-            if article['media'] in medias.keys():
-                self.articles[key]['support'] = medias[article['media']][0]
-                self.articles[key]['source_type'] = medias[article['media']][1]
-                self.articles[key]['root'] = medias[article['media']][2]
-            else:
-                if article['media'] not in self.unknowns:
-                    self.unknowns.append(article['media'])
-                self.articles[key]['support'] = article['media']
-                self.articles[key]['source_type'] = 'unknown source'
-                self.articles[key]['root'] = 'FACTIVA'
+        codex = get_support_publi(fname).codex
+        self.unknowns = assign_supports(self.articles, codex, 'FACTIVA')
 
     def write_prospero_files(self, save_dir=".", cleaning=False):
         """for each article, write txt and ctx in a given directory"""
-        for article in self.articles.values():
-            filepath = file_name(article['date'],
-                                 article['root'],
-                                 save_dir)
+        allocator = ProsperoNameAllocator(save_dir)
+        for article in self.articles:
+            filepath = allocator.name(article.date, article.root)
             path = os.path.join(save_dir, filepath + ".txt")
 
             if cleaning:
-                text_cleaner = Cleaner(article['text'].encode('utf-8'))
+                text_cleaner = Cleaner(article.text)
                 text = text_cleaner.content
             else:
-                text = article['text']
+                text = article.text
             with open(path, 'wb') as file:
                 # to bytes
                 file.write(text.encode('latin-1', 'xmlcharrefreplace'))
             ctx = [
                 "fileCtx0005",
-                article['title'],
-                article['support'],
+                article.title,
+                article.support,
                 "", "",
-                article['date'],
+                article.date,
                 "",
-                article['source_type'],
+                article.source_type,
                 "", "", "",
                 "Processed by Tiresias on %s" \
                 % datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
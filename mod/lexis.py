@@ -4,11 +4,14 @@ GPL3
 09/12/2019"""
 
 import glob
-import random
 import re
 import os
 import datetime
 
+from utils.supportpublimanager import get_support_publi
+from utils.prosperonames import ProsperoNameAllocator
+from utils.article import Article, assign_supports
+
 try:
     from cleaning import Cleaner
 except ModuleNotFoundError:
@@ -60,69 +63,44 @@ def format_date(date):
         return "00/00/0000"
 
 
-def file_name(date, prefix, save_dir):
-    """return a name in Prospero style"""
-    index, base = "A", 64
-    date = "".join(reversed(date.split("/")))
-    name = "%s%s%s" % (prefix, date, index)
-    path = os.path.join(save_dir, name + ".txt")
-    while os.path.isfile(path):
-        if ord(index[-1]) < 90:
-            index = chr(ord(index[-1]) + 1)
-        else:
-            base += 1
-            index = "A"
-        if base > 64:  # if Z => 2 letters
-            index = chr(base) + index
-        name = "%s%s%s" % (prefix, date, index)
-        path = os.path.join(save_dir, name + ".txt")
-    return name
+DOCUMENT_MOTIF = re.compile(r"Do[kc]ument \d+ (von|de|of) \d+")
+
+
+def iter_documents(filename):
+    """yield the content of each document of a Lexis export,
+    what follows a 'Document n of m' line, reading line by line"""
+    lines = None
+    with open(filename, 'rb') as file:
+        for line in file:
+            line = line.decode('utf-8')  # byte to str
+            if DOCUMENT_MOTIF.search(line):
+                if lines is not None:
+                    yield "".join(lines)
+                # the separator line stops before its end of line
+                lines = ["\n"] if line.endswith("\n") else []
+            elif lines is not None:
+                lines.append(line)
+    if lines is not None:
+        yield "".join(lines)
 
 
 class ParseTxt(object):
     """from txt of Lexis to Prospero"""
 
     def __init__(self, filename):
-        self.articles = {}
+        self.articles = []
         self.unknowns = []
         self.count = 0
-        with open(filename, 'rb') as file:
-            buf = file.read()
-            buf = buf.decode('utf-8')  # byte to str
-        cut_articles = re.split(r"(.*Do[kc]ument \d+ (von|de|of) \d+.*)", buf)[1:]
-        while cut_articles:
+        for content in iter_documents(filename):
             self.count += 1
-            cut_articles.pop(0)  # number
-            cut_articles.pop(0)  # language mark
-            id_article = random.randint(0, 1000000)
-            while id_article in self.articles.keys():
-                id_article = random.randint(0, 1000000)
-            self.articles[id_article] = \
-                self.process(cut_articles.pop(0))  # content
+            self.articles.append(Article(**self.process(content)))
 
     def get_supports(self, supports_path):
         """parse supports.publi and find correspondences"""
-        medias = {}
-        with open(supports_path, 'rb') as file:
-            buf = file.read()
-            buf = buf.decode('cp1252')  # byte to str
-            lines = re.split("\r*\n", buf)
-        for line in lines:
-            media = re.split('; ', line[:-1])
-            if media:
-                medias[media[0]] = media[1:]
-
-        for key, article in self.articles.items():
-            if article['media'] in medias.keys():
-                self.articles[key]['support'] = medias[article['media']][0]
-                self.articles[key]['source_type'] = medias[article['media']][1]
-                self.articles[key]['root'] = medias[article['media']][2]
-            else:
-                if article['media'] not in self.unknowns:
-                    self.unknowns.append(article['media'])
-                self.articles[key]['support'] = article['media']
-                self.articles[key]['source_type'] = 'unknown source'
-                self.articles[key]['root'] = 'LEXIS'
+        codex = get_support_publi(supports_path).codex
+        # file names have always been prefixed with the abbreviation
+        # less its last letter, kept for the corpora already written
+        self.unknowns = assign_supports(self.articles, codex, 'LEXIS', clip_abr=True)
 
     def process(self, content):
         head, waste, article = "", "", ""
@@ -166,29 +144,28 @@ class ParseTxt(object):
 
     def write_prospero_files(self, save_dir=".", cleaning=False):
         """for each article, write txt and ctx in a given directory"""
-        for article in self.articles.values():
-            filepath = file_name(article['date'],
-                                 article['root'],
-                                 save_dir)
+        allocator = ProsperoNameAllocator(save_dir)
+        for article in self.articles:
+            filepath = allocator.name(article.date, article.root)
             path = os.path.join(save_dir, filepath + ".txt")
 
-            article['text'] = article['title'] + "\r\n.\r\n" + article['text']
+            article.text = article.title + "\r\n.\r\n" + article.text
             if cleaning:
-                text_cleaner = Cleaner(article['text'].encode('utf-8'))
+                text_cleaner = Cleaner(article.text)
                 text = text_cleaner.content
             else:
-                text = article['text']
+                text = article.text
             with open(path, 'wb') as file:
                 # to bytes
                 file.write(text.encode('latin-1', 'xmlcharrefreplace'))
             ctx = [
                 "fileCtx0005",
-                article['title'],
-                article['support'],
+                article.title,
+                article.support,
                 "", "",
-                article['date'],
+                article.date,
                 "",
-                article['source_type'],
+                article.source_type,
                 "", "", "",
                 f"Processed by Tiresias on {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
                 "", "n", "n", ""
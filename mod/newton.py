@@ -9,11 +9,14 @@ modified 12/05/2021
 """
 
 import glob
-import random
 import re
 import os
 import datetime
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+
+from utils.supportpublimanager import get_support_publi
+from utils.prosperonames import ProsperoNameAllocator
+from utils.article import Article, assign_supports
 
 try:
     from cleaning import Cleaner
@@ -21,28 +24,39 @@ except ModuleNotFoundError:
     from mod.cleaning import Cleaner
 
 
-def file_name(date, prefix, save_dir):
-    """return a name in Prospero style"""
-    index, base = "A", 64
-    date = "".join(reversed(date.split("/")))
-    name = "%s%s%s" % (prefix, date, index)
-    path = os.path.join(save_dir, name + ".txt")
-    while os.path.isfile(path):
-        if ord(index[-1]) < 90:
-            index = chr(ord(index[-1]) + 1)
-        else:
-            base += 1
-            index = "A"
-        if base > 64:  # if Z => 2 letters
-            index = chr(base) + index
-        name = "%s%s%s" % (prefix, date, index)
-        path = os.path.join(save_dir, name + ".txt")
-    return name
+ARTICLE_TABLES = SoupStrainer("table", attrs={"style": "margin-top: 15px"})
+
+ENTITIES = {
+    #    '&#268;': 'Č',
+    #    '&#269;': 'č',
+    #    '&#271;': "d'",
+    #    "&#282;": 'Ě',
+    #    "&#283;": 'ě',
+    #    '&#328;': 'ň',
+    #    '&#344;': 'Ř',
+    #    "&#345;": 'ř',
+    #    '&#352;': 'Š',
+    #    '&#353;': 'š',
+    #    '&#357;': "ť",
+    #    '&#366;': 'Ů',
+    #    '&#367;': 'ů',
+    #    '&#381;': 'Ž',
+    #    '&#382;': 'ž',
+    '&#8211;': '-',
+    '&#8216;': "'",
+    '&#8218;': "'",
+    '&#8220;': '"',
+    '&#8222;': '"',
+    '&#8230;': '...',
+    '&amp;': '&',
+}
+ENTITY_MOTIF = re.compile("|".join(map(re.escape, ENTITIES)))
+CHARREF_MOTIF = re.compile(r"&#\d*;")
 
 
 class ParseNewton(object):
     def __init__(self, filename):
-        self.articles = {}
+        self.articles = []
         self.unknowns = []
         self.count = 0
         with open(filename, 'rb') as file:
@@ -51,22 +65,22 @@ class ParseNewton(object):
         articles = self.get_articles(buf)
         for article in articles:
             self.count += 1
-
-            id_article = random.randint(0, 1000000)
-            while id_article in self.articles.keys():
-                id_article = random.randint(0, 1000000)
-            self.articles[id_article] = self.process(article)  # content
+            self.articles.append(Article(**self.process(article)))  # content
+            article.extract()
 
     def get_articles(self, text):
-        soup = BeautifulSoup(text, 'lxml')
+        # only the article tables are built
+        soup = BeautifulSoup(text, 'lxml', parse_only=ARTICLE_TABLES)
         tables = soup.find_all("table",
                                attrs={"style": "margin-top: 15px"})
         articles = [table for table in tables
                     if len(table.find_all('tr')) == 3]
 
         print("found %s articles" % len(articles))
-        for article in articles:
-            yield article
+        # drop each table once processed
+        articles.reverse()
+        while articles:
+            yield articles.pop()
 
     def replace_cz(self, text):
         #        latin1 = text.encode('ISO-8859-1', 'xmlcharrefreplace')
@@ -75,35 +89,10 @@ class ParseNewton(object):
         latin2 = text.encode('iso-8859-2', 'xmlcharrefreplace')
         text = latin2.decode('iso-8859-2')
 
-        table = {
-            #            '&#268;': 'Č',
-            #            '&#269;': 'č',
-            #            '&#271;': "d'",
-            #            "&#282;": 'Ě',
-            #            "&#283;": 'ě',
-            #            '&#328;': 'ň',
-            #            '&#344;': 'Ř',
-            #            "&#345;": 'ř',
-            #            '&#352;': 'Š',
-            #            '&#353;': 'š',
-            #            '&#357;': "ť",
-            #            '&#366;': 'Ů',
-            #            '&#367;': 'ů',
-            #            '&#381;': 'Ž',
-            #            '&#382;': 'ž',
-            '&#8211;': '-',
-            '&#8216;': "'",
-            '&#8218;': "'",
-            '&#8220;': '"',
-            '&#8222;': '"',
-            '&#8230;': '...',
-            '&amp;': '&',
-        }
-        for xml, replace in table.items():
-            text = re.sub(xml, replace, text)
-        if re.search(r"&#\d*;", text):
+        text = ENTITY_MOTIF.sub(lambda entity: ENTITIES[entity.group()], text)
+        if CHARREF_MOTIF.search(text):
             print("Don't know how to replace :",
-                  ", ".join(re.findall(r"&#\d*;", text)))
+                  ", ".join(CHARREF_MOTIF.findall(text)))
         return text
 
     def process(self, content):
@@ -160,43 +149,25 @@ class ParseNewton(object):
 
     def get_supports(self, supports_path):
         """parse supports.publi and find correspondences"""
-        medias = {}
-        with open(supports_path, 'rb') as file:
-            buf = file.read()
-            buf = buf.decode('cp1252')  # byte to str
-            lines = re.split("\r*\n", buf)
-        for line in lines:
-            media = re.split('; ', line[:-1])
-            if media:
-                medias[media[0]] = media[1:]
-
-        for key, article in self.articles.items():
-            if article['media'] in medias.keys():
-                self.articles[key]['support'] = medias[article['media']][0]
-                self.articles[key]['source_type'] = medias[article['media']][1]
-                self.articles[key]['root'] = medias[article['media']][2]
-            else:
-                if article['media'] not in self.unknowns:
-                    self.unknowns.append(article['media'])
-                self.articles[key]['support'] = article['media']
-                self.articles[key]['source_type'] = 'unknown source'
-                self.articles[key]['root'] = 'NEWTON'
+        codex = get_support_publi(supports_path).codex
+        # file names have always been prefixed with the abbreviation
+        # less its last letter, kept for the corpora already written
+        self.unknowns = assign_supports(self.articles, codex, 'NEWTON', clip_abr=True)
 
     def write_prospero_files(self, save_dir=".", cleaning=False):
         """for each article, write txt and ctx in a given directory"""
-        for article in self.articles.values():
+        allocator = ProsperoNameAllocator(save_dir)
+        for article in self.articles:
 
-            filepath = file_name(article['date'],
-                                 article['root'],
-                                 save_dir)
+            filepath = allocator.name(article.date, article.root)
             path = os.path.join(save_dir, filepath + ".txt")
 
-            article['text'] = article['title'] + "\r\n.\r\n" + article['text']
+            article.text = article.title + "\r\n.\r\n" + article.text
             if cleaning:
-                text_cleaner = Cleaner(article['text'].encode('utf-8'))
+                text_cleaner = Cleaner(article.text)
                 text = text_cleaner.content
             else:
-                text = article['text']
+                text = article.text
 
             # to bytes
             text = text.encode('iso-8859-2', 'xmlcharrefreplace')
@@ -204,13 +175,13 @@ class ParseNewton(object):
                 file.write(text)
             ctx = [
                 "fileCtx0005",
-                article['title'],
-                article['support'],
+                article.title,
+                article.support,
                 "", "",
-                article['date'],
+                article.date,
                 "",
-                article['source_type'],
-                article["observations"],
+                article.source_type,
+                article.observations,
                 "", "",
                 f"Processed by Tiresias on {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
                 "", "n", "n", ""
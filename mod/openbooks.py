@@ -10,38 +10,25 @@ Version 3, 29 June 2007
 import datetime
 import os
 import re
-import urllib.parse
-import urllib.request
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from bs4 import BeautifulSoup
 
+from utils.prosperonames import ProsperoNameAllocator
+from utils.httpcache import get_http_cache
+
+# pages fetched at once
+WORKERS = 8
+
 try:
-    from cleaning import Cleaner
+    from cleaning import get_pipeline
 except ModuleNotFoundError:
-    from mod.cleaning import Cleaner
-
-
-def file_name(dest, date, prefix):
-    index, base = "A", 64
-    date = "".join(reversed(date.split("/")))
-    name = "%s%s%s" % (prefix, date, index)
-    path = os.path.join(dest, name + ".txt")
-    while os.path.isfile(path):
-        if ord(index[-1]) < 90:
-            index = chr(ord(index[-1]) + 1)
-        else:
-            base += 1
-            index = "A"
-        if base > 64:  # if Z => 2 letters
-            index = chr(base) + index
-        name = "%s%s%s" % (prefix, date, index)
-        path = os.path.join(dest, name + ".txt")
-    return name
+    from mod.cleaning import get_pipeline
 
 
 def extract_chapter(soup):
     titre = soup.find("h1", "title").text
-    text = titre + "\r\n.\r\n\r\n"
+    text = [titre + "\r\n.\r\n\r\n"]
     notes = {}
     notesoup = soup.find("div", {"id": "notes"})
     if notesoup:
@@ -56,23 +43,22 @@ def extract_chapter(soup):
                     if node.name == "a":
                         if "class" in node.attrs:
                             if node["class"] == ['footnotecall']:
-                                text += " [%s] " % re.sub(".$", "",
-                                                          notes[node.string])
+                                text.append(" [%s] " % re.sub(".$", "",
+                                                              notes[node.string]))
                         else:
                             # print(node.attrs)
                             pass
+                    elif isinstance(node.string, str):
+                        text.append(node.string)
                     else:
-                        try:
-                            text += node.string
-                        except:
-                            text += str(node.string)
-        text += "\r\n\r\n"
-    return text
+                        text.append(str(node.string))
+        text.append("\r\n\r\n")
+    return "".join(text)
 
 
-def get_soup(url):
-    with urllib.request.urlopen(url) as page:
-        return BeautifulSoup(page, "lxml")
+def get_soup(url, cache=None):
+    cache = cache or get_http_cache()
+    return BeautifulSoup(cache.get(url), "lxml")
 
 
 def create_ctx(path, metadata):
@@ -92,14 +78,14 @@ def create_ctx(path, metadata):
         "", "n", "n", ""
     ]
     ctx = "\r\n".join(ctx)
-    ctx_cleaner = Cleaner(ctx.encode('utf-8'))
+    ctx_cleaner = get_pipeline().clean(ctx)
     ctx = ctx_cleaner.content.encode('latin-1', 'xmlcharrefreplace')  # to bytes
     with open(path, 'wb') as file:
         file.write(ctx)
 
 
 def write_txt(path, text):
-    text_cleaner = Cleaner(text.encode('utf-8'))
+    text_cleaner = get_pipeline().clean(text)
     text = text_cleaner.content.encode('latin-1', 'xmlcharrefreplace')  # to bytes
     # text = text.encode('latin1', errors='xmlcharrefreplace')
     with open(path, 'wb') as f:
@@ -145,25 +131,46 @@ def get_metadata(soup):
             "date": soup.find("meta", {"name": "DC.date"})["content"], "ref": get_citing(soup)}
 
 
-def traite_url(url, save_dir="."):
-    soup = get_soup(url)
+def write_chapter(url, soup, save_dir, allocator):
+    metadata = get_metadata(soup)
+    chapter = extract_chapter(soup)
+    chapter_number = re.search(r"\d*$", url).group(0)
+    chap_name = chapter_number + metadata["authors"].split()[1]
+    filename = allocator.name("01/01/" + metadata["date"], chap_name)
+    path = os.path.join(save_dir, filename + ".txt")
+    write_txt(path, chapter)
+    path = os.path.join(save_dir, filename + ".ctx")
+    create_ctx(path, metadata)
+    return filename
+
+
+def process_page(url, save_dir, allocator, cache):
+    """write a chapter, return the chapter urls of a frontpage"""
+    soup = get_soup(url, cache)
     if not teste_sommaire(soup):
         # print("\tis a chapter")
-        metadata = get_metadata(soup)
-        chapter = extract_chapter(get_soup(url))
-        chapter_number = re.search(r"\d*$", url).group(0)
-        chap_name = chapter_number + metadata["authors"].split()[1]
-        filename = file_name(save_dir, "01/01/" + metadata["date"], chap_name)
-        path = os.path.join(save_dir, filename + ".txt")
-        write_txt(path, chapter)
-        path = os.path.join(save_dir, filename + ".ctx")
-        create_ctx(path, metadata)
-    else:
-        # print("\tis a frontpage")
-        chapters = get_chapters(soup)
-        chapter_urls = create_chapter_urls(url, chapters)
-        for chapter_url in chapter_urls:
-            traite_url(chapter_url, save_dir)
+        write_chapter(url, soup, save_dir, allocator)
+        return []
+    # print("\tis a frontpage")
+    return create_chapter_urls(url, get_chapters(soup))
+
+
+def traite_url(url, save_dir=".", allocator=None, workers=WORKERS, cache=None):
+    """write the chapter or all the chapters of a book,
+    each page being fetched once, several at a time"""
+    allocator = allocator or ProsperoNameAllocator(save_dir)
+    cache = cache or get_http_cache()
+    seen = {url}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {executor.submit(process_page, url, save_dir, allocator, cache)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for chapter_url in future.result():
+                    if chapter_url not in seen:
+                        seen.add(chapter_url)
+                        pending.add(executor.submit(process_page, chapter_url,
+                                                    save_dir, allocator, cache))
 
 
 if __name__ == "__main__":
@@ -8,37 +8,42 @@ import re
 import ssl
 import time
 import urllib.parse
-import urllib.request
+
+from utils.httpcache import get_http_cache
+from utils.httpclient import checked, content_charset
 
 ssl._create_default_https_context = ssl._create_unverified_context
 
 VERBOSE = 0
+# search results change as questions are published, always revalidated
+SEARCH_TTL = 0
 
 
 class QuestionParlementaire(object):
-    def __init__(self, url):
+    def __init__(self, url, cache=None):
         self.final = None
         self.D = None
         self.url = url
+        self.cache = cache or get_http_cache()
 
     def retreive(self):
-        with urllib.request.urlopen(self.url) as page:
-            charset = page.info().get_param('charset')
+        page = checked(self.cache.request(self.url))
+        charset = content_charset(page)
 
-            if charset:
-                buf = page.read().decode(charset)
-            else:
-                p = page.read()
-                buf = p.decode("latin-1")
+        if charset:
+            buf = page.body.decode(charset)
+        else:
+            p = page.body
+            buf = p.decode("latin-1")
 
-                # search for misencoding
-                if re.search('encoding="UTF-8', buf):
-                    buf = p.decode("utf-8")
+            # search for misencoding
+            if re.search('encoding="UTF-8', buf):
+                buf = p.decode("utf-8")
 
-            if re.search("questions.assemblee-nationale.fr", self.url):
-                self.D = ParseAss(buf).data
-            else:
-                self.D = ParseSenat(buf).data
+        if re.search("questions.assemblee-nationale.fr", self.url):
+            self.D = ParseAss(buf).data
+        else:
+            self.D = ParseSenat(buf).data
 
     def ctx_content(self, r, title, ref):
         c = ["fileCtx0005", title]
@@ -404,8 +409,9 @@ a>.*\((.*) - <span>(.*)</span>')
 class CrawlAss(object):
     """Search in Assemblée db via website form"""
 
-    def __init__(self, leg, words):
+    def __init__(self, leg, words, cache=None):
         self.dicQ = {}
+        self.cache = cache or get_http_cache()
         html = self.getpage(leg, words)
         self.get_questions(html)
         if VERBOSE:
@@ -422,8 +428,7 @@ class CrawlAss(object):
             ("limit", 10000000),
         )
         data = urllib.parse.urlencode(form_data).encode()
-        with urllib.request.urlopen(url, data) as response:
-            return response.read().decode()
+        return self.cache.get(url, data, ttl=SEARCH_TTL).decode()
 
     def get_questions(self, html):
         for q in re.split('<tr>', html)[2:]:
@@ -609,7 +614,8 @@ sur la liste d'aucun groupe",
 class CrawlSenat(object):
     """Search in Senat db via website form"""
 
-    def __init__(self, words, date_from, date_to):
+    def __init__(self, words, date_from, date_to, cache=None):
+        self.cache = cache or get_http_cache()
         words = words.split(" ")
         # search after 2 avril 1978.
         # Not digitized before 8th legislation (may 86)
@@ -642,17 +648,16 @@ class CrawlSenat(object):
         url = "https://www.senat.fr/basile/rechercheQuestion.do?tri=da\
 &radio=deau&rch=qs&aff=ens\
 &unk=%s&de=%s&au=%s&off=%d" % ("+".join(words), date_from, date_to, offset)
-        urllib.request.urlopen(url)
 
         try:
             if VERBOSE:
                 print(url)
-            with urllib.request.urlopen(url) as page:
-                charset = page.info().get_param('charset')
-                if charset:
-                    buf = page.read().decode(charset)
-                else:
-                    buf = page.read().decode("latin1")
+            page = checked(self.cache.request(url, ttl=SEARCH_TTL))
+            charset = content_charset(page)
+            if charset:
+                buf = page.body.decode(charset)
+            else:
+                buf = page.body.decode("latin1")
             return buf
         except:
             return False
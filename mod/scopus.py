@@ -67,7 +67,7 @@ def ctx_prospero(csvfile, save_dir=".",
         txt_content += papers[eid][3]
 
         if cleaning:
-            text_cleaner = Cleaner(txt_content.encode('utf-8'))
+            text_cleaner = Cleaner(txt_content)
             txt_content = text_cleaner.content
         txt_content = txt_content.encode('latin-1',
                                          'xmlcharrefreplace')  # to bytes
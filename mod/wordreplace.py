@@ -2,18 +2,14 @@
 Author Josquin Debaz
 GPL 3
 """
-import os
 import re
 
+from utils.corpuswalker import iter_files
 
-def list_files(rep='.', exts=('.txt', '.TXT'), recursive=True):
+
+def list_files(rep='.', exts=('.txt', '.TXT'), recursive=True, snapshot=False):
     """List txt files"""
-    txt_files = []
-    for roots, _, files in os.walk(u'%s' % rep):
-        txt_files.extend([os.path.join(roots, f) for f in files if os.path.splitext(f)[1] in exts])
-        if not recursive:
-            break
-    return txt_files
+    return list(iter_files(rep, exts, recursive, snapshot=snapshot))
 
 
 class Replacer:
@@ -23,6 +19,7 @@ class Replacer:
         self.log = None
         self.content = None
         self.motif = None
+        self.count_motif = None
         self.repl = None
 
     def set_content(self, content):
@@ -36,14 +33,17 @@ class Replacer:
         else:
             marks = r"\s"
         froms = [re.escape(i) for i in tofrom[1:]]
-        froms = "(^|[%s])(%s)([%s]|$)" % (marks,
-                                          '|'.join(froms),
-                                          marks)
-        self.motif = re.compile(froms)
+        froms = '|'.join(froms)
+        self.motif = re.compile("(^|[%s])(%s)([%s]|$)" % (marks, froms, marks))
+        # following mark not consumed, so that adjacent matches are all counted
+        self.count_motif = re.compile("(^|[%s])(%s)(?=[%s]|$)" % (marks, froms, marks))
         self.repl = r"\g<1>%s\g<3>" % tofrom[0]
 
-    def process(self):
-        """execute replacements"""
+    def process(self, analyse=False):
+        """execute replacements, or only count them when analysing"""
+        if analyse:
+            self.log = sum(1 for _ in self.count_motif.finditer(self.content))
+            return
         self.log = 0
         while self.motif.search(self.content):
             self.content = self.motif.sub(self.repl, self.content, 1)
@@ -0,0 +1,62 @@
+""" Benchmark Cleaner.html_tags against the former quadratic version
+on tag dense Europresse exports
+python -m tests.bench_html_tags
+"""
+import glob
+import re
+import time
+
+from mod.cleaning import Cleaner
+
+
+def former_html_tags(cleaner):
+    """html_tags before the single scan tokenizer"""
+    tags = ['<i>', '</i>', '<em>', '</em>',
+            '<strong>', '</strong>',
+            '</tr>', '<td>', '</td>',
+            '&lt;i&gt;', '&lt;/i&gt;',
+            '&lt;/strong&gt;', '&lt;strong&gt;',
+            "<div>", "</div>", "<ul>", "</ul>",
+            "<p>", "<span>", "</span>",
+            "<b>", "</b>",
+            "<p align='center'>", '<p align="CENTER">',
+            '<center>', '</center>',
+            '</pre>',
+            ]
+    number = 0
+    for tag in tags:
+        tag_number = cleaner.content.count(tag)
+        if tag_number:
+            cleaner.content = cleaner.content.replace(tag, "")
+            number += tag_number
+    unlisted = re.findall("<([a-z]*)>", cleaner.content)
+    if unlisted:
+        for balise in unlisted:
+            opening = re.findall("<%s>" % balise, cleaner.content)
+            closing = re.findall("</%s>" % balise, cleaner.content)
+            if len(opening) == len(closing):
+                cleaner.content = re.sub("<%s>" % balise, "", cleaner.content)
+                cleaner.content = re.sub("</%s>" % balise, "", cleaner.content)
+                number += len(opening)
+    cleaner.content, singles = re.subn(r"<[a-z]{1,} \S*>", "", cleaner.content)
+    cleaner.content, links = re.subn("<a .*>(.*)</a>", "\\1", cleaner.content)
+    return number + singles + links
+
+
+def bench(path):
+    with open(path, 'rb') as file:
+        buf = file.read()
+    former, current = Cleaner(buf, ""), Cleaner(buf, "")
+    start = time.perf_counter()
+    former_number = former_html_tags(former)
+    middle = time.perf_counter()
+    number = current.html_tags()
+    end = time.perf_counter()
+    assert (former.content, former_number) == (current.content, number)
+    print("%s: %d tags, former %.3fs, single scan %.3fs"
+          % (path, number, middle - start, end - middle))
+
+
+if __name__ == '__main__':
+    for export in glob.glob("tests/europresse/*.HTML") + glob.glob("tests/factiva/*.htm*"):
+        bench(export)
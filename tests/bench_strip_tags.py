@@ -0,0 +1,27 @@
+""" Benchmark strip_tags_with_class against the former search loop
+on a 200 KB Europresse like article full of highlights
+python -m tests.bench_strip_tags
+"""
+import time
+
+from mod.europresse import strip_tags_with_class
+from tests.utils import former_strip_tags_with_class
+
+
+def dense_article(size=200000):
+    paragraph = ('<p class="p">Le <span class="highlight"><mark>climat</mark></span> '
+                 'change, disent les <b>experts</b> du <span class="highlight">GIEC</span> '
+                 'dans un <i>rapport</i> publié lundi.</p>\n')
+    return paragraph * (size // len(paragraph))
+
+
+if __name__ == '__main__':
+    article = dense_article()
+    start = time.perf_counter()
+    former = former_strip_tags_with_class(article)
+    middle = time.perf_counter()
+    current = strip_tags_with_class(article)
+    end = time.perf_counter()
+    assert former == current
+    print("%d characters: former %.3fs, single pass %.3fs"
+          % (len(article), middle - start, end - middle))
@@ -0,0 +1,11 @@
+import pytest
+
+import utils.corpuswalker
+
+
+@pytest.fixture
+def state_directory(tmp_path_factory, monkeypatch):
+    """corpus snapshots and manifests kept out of the home directory"""
+    directory = str(tmp_path_factory.mktemp("state"))
+    monkeypatch.setattr(utils.corpuswalker, "STATE_DIRECTORY", directory)
+    return directory
@@ -0,0 +1,33 @@
+from utils.article import Article, assign_supports
+
+
+def test_assign_supports():
+    codex = {'Le Monde': {'source': 'Le Monde', 'type': 'Presse nationale', 'abr': 'LM'}}
+    articles = [Article(title="a", date="01/01/2022", media="Le Monde", text="x"),
+                Article(title="b", date="01/01/2022", media="La Gazette", text="y"),
+                Article(title="c", date="01/01/2022", media="Le Monde", text="z"),
+                Article(title="d", date="01/01/2022", media="La Gazette", text="t")]
+
+    unknowns = assign_supports(articles, codex, 'FACTIVA')
+
+    assert unknowns == ["La Gazette"]
+    assert [article.root for article in articles] == ["LM", "FACTIVA", "LM", "FACTIVA"]
+    assert articles[1].support == "La Gazette"
+    assert articles[1].source_type == 'unknown source'
+    assert articles[0].source_type is articles[2].source_type
+
+
+def test_assign_supports_clipped():
+    codex = {'Le Monde': {'source': 'Le Monde', 'type': 'Presse nationale', 'abr': 'LMD'}}
+    articles = [Article(title="a", date="01/01/2022", media="Le Monde", text="x"),
+                Article(title="b", date="01/01/2022", media="La Gazette", text="y")]
+
+    assign_supports(articles, codex, 'LEXIS', clip_abr=True)
+
+    assert [article.root for article in articles] == ["LM", "LEXIS"]
+
+
+def test_article_has_no_dict():
+    article = Article(title="a")
+    assert not hasattr(article, "__dict__")
+    assert article.narrator is None
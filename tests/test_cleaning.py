@@ -1,7 +1,12 @@
 import os
+import time
 import shutil
+import hashlib
 
-from mod.cleaning import list_files
+from mod.cleaning import list_files, Cleaner, get_pipeline, clean_files
+from mod.cleaning import CleaningManifest, clean_stream, clean_file, cut_point
+import mod.cleaning
+from utils.corpuswalker import CorpusSnapshot
 
 
 def test_list_files():
@@ -34,3 +39,145 @@ def delete_filesystem():
         return 0
 
     shutil.rmtree("up_dir")
+
+
+def test_char_replace():
+    cleaner = Cleaner(b"l&rsquo;euro &#8364; &#8364x e&#769;t&#xd;#xd;&#8294;", "c")
+
+    assert cleaner.content == "l'euro euros eurosx ét   "
+    assert cleaner.log == {'chars': 7}
+
+
+def test_replace_ascii():
+    cleaner = Cleaner("l\x92\xe9t\xe9 \x96 \x85\x0c`\x9c".encode('latin-1'), "a")
+
+    assert cleaner.content == "l'été - ...\n'oe"
+    assert cleaner.log == {'ascii': 6}
+
+
+def test_pipeline():
+    pipeline = get_pipeline("st")
+    assert pipeline is get_pipeline("st")
+    for buf in (b"1 000 <i>a</i> <u>b</u>", b"12.345 <b>c</b>"):
+        assert pipeline.clean(buf).log == Cleaner(buf, "st").log
+        assert pipeline.clean(buf).content == Cleaner(buf, "st").content
+
+
+def test_clean_files(tmp_path):
+    dirty = tmp_path / "dirty.txt"
+    dirty.write_bytes(b"1 000 <i>a</i>")
+    clean = tmp_path / "clean.txt"
+    clean.write_bytes(b"nothing")
+    paths = [str(dirty), str(clean)]
+    assert clean_files(paths, "st", test=True) == [
+        (str(dirty), {'split numbers': 1, 'html tags': 2}, None), (str(clean), {}, None)]
+    assert dirty.read_bytes() == b"1 000 <i>a</i>"
+    clean_files(paths, "st")
+    assert dirty.read_bytes() == b"1000 a"
+
+
+def test_cleaning_manifest(tmp_path, state_directory):
+    for name in ("a.txt", "b.txt"):
+        (tmp_path / name).write_bytes(b"1 000")
+    manifest = CleaningManifest(str(tmp_path), "s")
+    assert len(list_files(str(tmp_path), manifest=manifest)) == 2
+    for path, _, fingerprint in clean_files([str(tmp_path / "a.txt")], "s"):
+        manifest.record(path, fingerprint)
+    manifest.save()
+
+    manifest = CleaningManifest(str(tmp_path), "s")
+    assert list_files(str(tmp_path), manifest=manifest) == [str(tmp_path / "b.txt")]
+    assert len(list_files(str(tmp_path), manifest=CleaningManifest(str(tmp_path), "st"))) == 2
+    (tmp_path / "a.txt").write_bytes(b"2 000")
+    assert len(list_files(str(tmp_path), manifest=manifest)) == 2
+
+
+def test_unchanged_run_not_rescanned(tmp_path, state_directory, monkeypatch):
+    os.makedirs(tmp_path / "a")
+    for name in ("x.txt", "a/y.txt"):
+        (tmp_path / name).write_bytes(b"1 000")
+    past = time.time() - 60
+    for directory in (tmp_path, tmp_path / "a"):
+        os.utime(directory, (past, past))
+    root = str(tmp_path)
+
+    def run():
+        manifest = CleaningManifest(root, "s")
+        paths = list_files(root, manifest=manifest, snapshot=True)
+        for path, _, fingerprint in clean_files(paths, "s"):
+            manifest.record(path, fingerprint)
+        manifest.save()
+        return paths
+
+    assert len(run()) == 2
+    assert os.stat(root).st_mtime == past
+    assert sorted(os.listdir(root)) == ["a", "x.txt"]
+
+    scanned = []
+    scan = CorpusSnapshot.scan
+    monkeypatch.setattr(CorpusSnapshot, "scan",
+                        staticmethod(lambda path, mtime: scanned.append(path) or scan(path, mtime)))
+    assert run() == []
+    assert scanned == []
+    assert len(os.listdir(state_directory)) == 2
+
+
+def test_clean_stream(tmp_path):
+    lines = ["Une ligne coup\xe9e en fin de mot par un trait d'union con-",
+             "tinu sur la ligne suivante, 1 000 fois, avec des <i>tags</i>",
+             "et les \u0153uvres d&eacute;j&agrave; cit\xe9es par l.e lecteur."] * 50
+    source = tmp_path / "source.txt"
+    for encoding in ("utf-8", "latin-1"):
+        buf = "\r\n".join(lines).encode(encoding, 'xmlcharrefreplace')
+        source.write_bytes(buf)
+        cleaner = Cleaner(buf)
+        for chunk_size in (100, 1000, 1 << 20):
+            destination = tmp_path / "destination.txt"
+            log = clean_stream(str(source), str(destination), chunk_size=chunk_size)
+            assert destination.read_bytes() == bytes(cleaner.content, 'latin-1')
+            assert log == cleaner.log
+    # in place
+    clean_stream(str(source), str(source), chunk_size=100)
+    assert source.read_bytes() == bytes(cleaner.content, 'latin-1')
+    assert sorted(os.listdir(tmp_path)) == ["destination.txt", "source.txt"]
+
+
+def test_cut_point():
+    prose = b"Une phrase qui finit par un point.\r\nEt une autre ligne-\r\n" * 30000
+    cut = cut_point(prose)
+    assert len(prose) - cut < mod.cleaning.CUT_WINDOW
+    assert prose[:cut].endswith(b"point.\r\n")
+
+
+def test_clean_large_file(tmp_path, monkeypatch):
+    buf = "\r\n".join(["Des \u0153uvres d&eacute;j&agrave; vues, 1 000 fois, con-",
+                        "tinues."] * 200).encode("utf-8")
+    expected = Cleaner(buf)
+    path = tmp_path / "large.txt"
+    path.write_bytes(buf)
+    monkeypatch.setattr(mod.cleaning, "STREAM_SIZE", 100)
+    log, fingerprint = clean_file(str(path), test=True)
+    assert fingerprint is None and path.read_bytes() == buf
+    log, fingerprint = clean_file(str(path))
+    assert path.read_bytes() == bytes(expected.content, 'latin-1')
+    assert log == {key: value for key, value in expected.log.items() if value != 0}
+    assert fingerprint[0] == len(path.read_bytes())
+    assert fingerprint[2] == hashlib.sha1(path.read_bytes()).hexdigest()
+
+
+def test_html_tags():
+    buf = b"<i>a</i> <u>b</u><u>c</u> <x>odd</x></x> <img src=y> <a href='z'>link</a> <>e</>"
+    cleaner = Cleaner(buf, "t")
+    assert cleaner.content == "a bc <x>odd</x></x>   e"
+    assert cleaner.log == {'html tags': 7}
+
+
+def test_str_content():
+    text = "l’œuvre déjà … ■ caf\xe9"
+    for options in ("uce", "u", ""):
+        from_bytes = Cleaner(text.encode('utf-8'), options)
+        from_str = Cleaner(text, options)
+        if options:
+            assert (from_str.content, from_str.log) == (from_bytes.content, from_bytes.log)
+    assert Cleaner(text, "u").content == "l&#8217;&#339;uvre déjà &#8230; &#9632; caf\xe9"
+    assert Cleaner(text, "").content == text
@@ -0,0 +1,54 @@
+import os
+import shutil
+
+from utils.corpuswalker import iter_files, CorpusSnapshot
+
+
+def walk(rep, exts, recursive=True):
+    found = []
+    for root, _, files in os.walk(rep):
+        found.extend(os.path.join(root, name)
+                     for name in files
+                     if os.path.splitext(name)[1] in exts)
+        if not recursive:
+            break
+    return found
+
+
+def test_iter_files(tmp_path):
+    for directory in ("a/b", "a/c/d", "e", "f"):
+        os.makedirs(tmp_path / directory)
+    for path in ("x.txt", "y.TXT", "z.ctx", "a/x.txt", "a/b/x.txt",
+                 "a/c/d/x.txt", "a/c/d/y.ctx", "e/x.txt"):
+        (tmp_path / path).write_text("")
+    root = str(tmp_path)
+
+    for exts in ((".txt", ".TXT"), (".ctx",)):
+        assert list(iter_files(root, exts)) == walk(root, exts)
+        assert list(iter_files(root, exts, workers=4)) == walk(root, exts)
+        assert list(iter_files(root, exts, recursive=False)) == walk(root, exts, False)
+    assert len(list(iter_files(root))) == 6
+
+
+def test_snapshot(tmp_path, state_directory):
+    for directory in ("a/b", "c"):
+        os.makedirs(tmp_path / directory)
+    for path in ("x.txt", "a/x.txt", "a/b/x.txt", "c/x.txt"):
+        (tmp_path / path).write_text("")
+    root = str(tmp_path)
+    expected = walk(root, (".txt",))
+
+    assert list(iter_files(root, (".txt",), snapshot=True)) == expected
+    snapshot = CorpusSnapshot(root)
+    assert set(snapshot.directories) == {".", "a", os.path.join("a", "b"), "c"}
+    # served from the snapshot when directory mtimes are kept
+    for key in snapshot.directories:
+        snapshot.directories[key]['mtime'] = os.stat(os.path.join(root, key)).st_mtime
+    snapshot.directories["c"]['files']["ghost.txt"] = [0, 0]
+    snapshot.save()
+    assert os.path.join(root, "c", "ghost.txt") in iter_files(root, (".txt",), snapshot=True)
+
+    shutil.rmtree(tmp_path / "a")
+    (tmp_path / "c" / "y.txt").write_text("")
+    assert list(iter_files(root, (".txt",), snapshot=True)) == walk(root, (".txt",))
+    assert set(CorpusSnapshot(root).directories) == {".", "c"}
@@ -1,8 +1,13 @@
 import os
+import re
+import html
 
+import mod.europresse
 from mod.europresse import format_support_name, EuropresseHtmlParser, EuropresseProsperoFileWriter, \
-    strip_tags_with_class, fetch_date, in_tag, name_file, create_txt_content, create_ctx_content
-from tests.utils import free_directory, delete_directory
+    strip_tags_with_class, fetch_date, in_tag, name_file, create_txt_content, create_ctx_content, \
+    get_header_infos, read_raw_header, entities_keep_tags, iter_raw_articles, iter_articles, \
+    article_fingerprint, try_parse_export
+from tests.utils import free_directory, delete_directory, former_strip_tags_with_class
 
 
 def test_europresse_e2e():
@@ -58,6 +63,102 @@ def test_strip_tags_with_class():
     assert result == "something"
 
 
+def test_strip_nested_tags_with_class():
+    assert strip_tags_with_class('<span class="a"><span class="b">x</span> y</span> <mark>z</mark>') == "x y z"
+    assert strip_tags_with_class('<span class="a">x<span>y</span>z</span>') == "x<span>y</span>z"
+    assert strip_tags_with_class('<p class="p">a <b>b</p> c</b>') == "a <b>b c</b>"
+    assert strip_tags_with_class('<b class="c">x</b></b> <i>y</i>') == "x</b> <i>y</i>"
+    assert strip_tags_with_class('<div><br class="br" /><img src="a.jpg"></div><span class="h">x</span>') == \
+        '<div><img src="a.jpg"></div>x'
+    # marks are kept when there is no tag with class
+    assert strip_tags_with_class("<mark>z</mark> <b>y</b>") == "<mark>z</mark> <b>y</b>"
+
+
+def test_strip_adjacent_tags_with_class():
+    assert strip_tags_with_class('<span class="h">mot</span>' * 3) == "motmotmot"
+    assert strip_tags_with_class('<p>' + '<span class="h">mot</span>' * 400 + '</p>') == '<p>' + 'mot' * 400 + '</p>'
+    assert strip_tags_with_class(('<b class="h">' + 'y' * 20) * 400) == 'y' * 8000
+    assert strip_tags_with_class('<span class="h">' * 400 + 'x' + '</span>' * 400) == 'x'
+    unclosed = '<' + 'a' * 100000
+    assert strip_tags_with_class(unclosed) == unclosed
+
+
+def test_strip_tags_with_class_as_former(monkeypatch):
+    texts = []
+
+    def recorded(text):
+        texts.append(text)
+        return strip_tags_with_class(text)
+
+    monkeypatch.setattr(mod.europresse, "strip_tags_with_class", recorded)
+    directory_path = "tests" if os.path.isdir("tests") else "."
+    for name in ("biblioeuropresse2021.HTML", "pesquet_19-11-21_a_26-10-23.HTML"):
+        list(iter_articles(os.path.join(directory_path, "europresse", name)))
+
+    assert sum(1 for text in texts if text and " class=" in text) > 100
+    for text in texts:
+        if text:
+            assert strip_tags_with_class(text) == former_strip_tags_with_class(text)
+
+
+def test_read_raw_header():
+    headers = ['<div class="titreArticle"><p>L&#39;&eacute;t&eacute; &amp; <b>nous</b></p></div>'
+               '<span class="DocPublicationName">Le Monde &nbsp;</span><b><p>sous&#45;titre</p></b>',
+               '<div class="titreArticle">a &lt;/div&gt; b</div>']
+    for header in headers:
+        if entities_keep_tags(header):
+            assert read_raw_header(header) == get_header_infos(html.unescape(header))
+    assert not entities_keep_tags(headers[1])
+
+    to_parse = os.path.join("tests" if os.path.isdir("tests") else ".",
+                            "europresse/biblioeuropresse2021.HTML")
+    for article in EuropresseHtmlParser(to_parse).articles:
+        header = article.split("</header>")[0]
+        if entities_keep_tags(header):
+            assert read_raw_header(header) == get_header_infos(html.unescape(header))
+
+
+def test_iter_raw_articles():
+    to_parse = os.path.join("tests" if os.path.isdir("tests") else ".",
+                            "europresse/biblioeuropresse2021.HTML")
+    with open(to_parse, 'rb') as file_pointer:
+        expected = re.split('<article>', file_pointer.read().decode('utf-8'))[1:]
+    for chunk_size in (8, 9, 4096):
+        assert list(iter_raw_articles(to_parse, chunk_size)) == expected
+
+    assert list(iter_articles(to_parse)) == EuropresseHtmlParser(to_parse).parsed_articles
+
+
+def test_article_fingerprint():
+    article = {"source": "Le Monde", "date": "20231023", "title": "Un  titre",
+               "narrator": False, "subtitle": False, "text": "Un texte\n sur deux lignes"}
+    spaced = dict(article, title="Un titre ", text=" Un texte sur  deux lignes")
+    other = dict(article, text="Un autre texte")
+    assert article_fingerprint(article) == article_fingerprint(spaced)
+    assert article_fingerprint(article) != article_fingerprint(other)
+
+    to_parse = os.path.join("tests" if os.path.isdir("tests") else ".",
+                            "europresse/biblioeuropresse2021.HTML")
+    articles = EuropresseHtmlParser(to_parse).parsed_articles
+    unique = []
+    for article in articles:
+        if article not in unique:
+            unique.append(article)
+    assert len({article_fingerprint(article) for article in articles}) == len(unique)
+
+
+def test_try_parse_truncated_export(tmp_path):
+    to_parse = os.path.join("tests" if os.path.isdir("tests") else ".",
+                            "europresse/biblioeuropresse2021.HTML")
+    with open(to_parse, "rb") as file:
+        export = file.read()
+    assert try_parse_export(to_parse) == list(iter_articles(to_parse))
+
+    truncated = tmp_path / "truncated.HTML"
+    truncated.write_bytes(export[:len(export) // 2])
+    assert try_parse_export(str(truncated)) is None
+
+
 def test_fetch_date():
     result = fetch_date("lundi 16 octobre 2023 - 16:55:20 -0000 1017 mots")
     assert result == "16/10/2023"
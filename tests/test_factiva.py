@@ -1,7 +1,8 @@
 import glob
 import os
+import re
 
-from mod.factiva import ParseHtm
+from mod.factiva import ParseHtm, parse
 from tests.utils import free_directory, delete_directory
 
 
@@ -36,3 +37,18 @@ def test_can_parse_htm():
 
     free_directory("temp")
     delete_directory("temp")
+
+
+def test_parse():
+    directory_path = "." if os.path.basename(os.getcwd()) == "tests" else "tests"
+    with open(os.path.join(directory_path, "factiva/Factiva.htm"), "rb") as file:
+        buf = file.read().decode("utf-8")
+    article = re.split(' class="article [a-z]{2}Article">', buf)[1]
+
+    result = parse(article)
+
+    assert result["title"] == "Marine Le Pen ambitionne l'indépendance énergétique"
+    assert result["date"] == "15/03/2022"
+    assert result["media"] == "Le Figaro"
+    assert result["text"].startswith(result["title"] + "\r\n.\r\nC'EST une riposte")
+    assert "</p>" not in result["text"]
@@ -0,0 +1,169 @@
+import os
+import threading
+import urllib.error
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from utils.httpcache import HttpCache
+from utils.httpclient import HttpClient
+
+ETAG = '"v1"'
+LAST_MODIFIED = "Mon, 05 Oct 2026 10:00:00 GMT"
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests = Counter()
+    revalidated = Counter()
+
+    def answer(self, body):
+        PageHandler.requests[self.command, self.path] += 1
+        if self.path == "/missing":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == ETAG:
+            PageHandler.revalidated[self.path] += 1
+            self.send_response(304)
+            self.send_header("ETag", ETAG)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        # like the search listings, no validators
+        if not self.path.startswith("/listing"):
+            self.send_header("ETag", ETAG)
+            self.send_header("Last-Modified", LAST_MODIFIED)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.startswith("/same"):
+            self.answer(b"<p>same</p>")
+        else:
+            self.answer(("<p>%s</p>" % self.path).encode("utf-8"))
+
+    def do_POST(self):
+        data = self.rfile.read(int(self.headers["Content-Length"]))
+        self.answer(b"<p>" + data + b"</p>")
+
+    def do_CONNECT(self):
+        PageHandler.requests[self.command, self.path, self.headers.get("Proxy-Authorization")] += 1
+        self.send_response(407)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    PageHandler.requests.clear()
+    PageHandler.revalidated.clear()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://127.0.0.1:%d" % server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def test_fresh_and_revalidated(server, tmp_path):
+    cache = HttpCache(str(tmp_path))
+    assert cache.get(server + "/page") == b"<p>/page</p>"
+    assert cache.get(server + "/page") == b"<p>/page</p>"
+    assert PageHandler.requests["GET", "/page"] == 1
+
+    response = cache.request(server + "/page", ttl=0)
+    assert response.status == 200
+    assert response.body == b"<p>/page</p>"
+    assert response.headers["etag"] == ETAG
+    assert PageHandler.requests["GET", "/page"] == 2
+    assert PageHandler.revalidated["/page"] == 1
+
+
+def test_offline(server, tmp_path):
+    HttpCache(str(tmp_path)).get(server + "/page")
+    offline = HttpCache(str(tmp_path), ttl=0, offline=True)
+    assert offline.get(server + "/page") == b"<p>/page</p>"
+    with pytest.raises(urllib.error.URLError):
+        offline.get(server + "/other")
+    assert PageHandler.requests["GET", "/page"] == 1
+    assert ("GET", "/other") not in PageHandler.requests
+
+
+def test_post_data_in_key(server, tmp_path):
+    cache = HttpCache(str(tmp_path))
+    assert cache.get(server + "/form", b"q=a") == b"<p>q=a</p>"
+    assert cache.get(server + "/form", b"q=b") == b"<p>q=b</p>"
+    assert cache.get(server + "/form", b"q=a") == b"<p>q=a</p>"
+    assert PageHandler.requests["POST", "/form"] == 2
+
+
+def test_bodies_shared(server, tmp_path):
+    cache = HttpCache(str(tmp_path))
+    cache.get(server + "/same/1")
+    cache.get(server + "/same/2")
+    assert len(os.listdir(os.path.join(str(tmp_path), "entries"))) == 2
+    assert len(os.listdir(os.path.join(str(tmp_path), "bodies"))) == 1
+
+
+def test_error_not_cached(server, tmp_path):
+    cache = HttpCache(str(tmp_path))
+    for _ in range(2):
+        with pytest.raises(urllib.error.HTTPError):
+            cache.get(server + "/missing")
+    assert PageHandler.requests["GET", "/missing"] == 2
+    assert os.listdir(os.path.join(str(tmp_path), "entries")) == []
+
+
+class UnreachableClient:
+    def request(self, url, headers=None, data=None):
+        raise urllib.error.URLError("unreachable")
+
+
+def test_listing_without_validators(server, tmp_path):
+    cache = HttpCache(str(tmp_path))
+    for _ in range(2):
+        assert cache.get(server + "/listing", ttl=0) == b"<p>/listing</p>"
+    assert PageHandler.requests["GET", "/listing"] == 2
+    assert os.listdir(os.path.join(str(tmp_path), "entries")) == []
+    assert os.listdir(os.path.join(str(tmp_path), "bodies")) == []
+
+    cache.get(server + "/listing")
+    cache.get(server + "/listing")
+    assert PageHandler.requests["GET", "/listing"] == 3
+
+
+def test_stale_when_unreachable(server, tmp_path):
+    HttpCache(str(tmp_path)).get(server + "/page")
+    cache = HttpCache(str(tmp_path), ttl=0, client=UnreachableClient())
+    assert cache.get(server + "/page") == b"<p>/page</p>"
+    with pytest.raises(urllib.error.URLError):
+        cache.get(server + "/other")
+
+
+def test_http_proxy(server, tmp_path):
+    cache = HttpCache(str(tmp_path), client=HttpClient(proxies={"http": server}))
+    assert cache.get("http://tiresias.invalid/page?q=1") == b"<p>http://tiresias.invalid/page?q=1</p>"
+    assert PageHandler.requests["GET", "http://tiresias.invalid/page?q=1"] == 1
+
+
+def test_https_proxy_tunnel(server):
+    proxy = server.replace("http://", "http://user:secret@")
+    client = HttpClient(proxies={"https": proxy})
+    with pytest.raises(OSError):
+        client.get("https://tiresias.invalid/page")
+    assert PageHandler.requests["CONNECT", "tiresias.invalid:443", "Basic dXNlcjpzZWNyZXQ="] == 1
+
+
+def test_proxy_bypassed(server, tmp_path, monkeypatch):
+    monkeypatch.setenv("no_proxy", "127.0.0.1")
+    cache = HttpCache(str(tmp_path), client=HttpClient(proxies={"http": "http://tiresias.invalid:3128"}))
+    assert cache.get(server + "/page") == b"<p>/page</p>"
+    assert PageHandler.requests["GET", "/page"] == 1
@@ -0,0 +1,21 @@
+import re
+
+from mod.lexis import iter_documents
+
+
+def test_iter_documents(tmp_path):
+    export = ("Liste de résultats\r\n\r\n"
+              "                 Document 1 de 3\r\n\r\n"
+              "                 Le Monde\r\n\r\n"
+              "                 3 mai 2021 lundi\r\n\r\n"
+              "Un titre\r\n\r\nLONGUEUR: 120 mots\r\n\r\nLe texte, Dokument 7 von 9 cité.\r\n"
+              "LOAD-DATE: 4 mai 2021\r\n"
+              "Document 2 of 3\n"
+              "second\r\n"
+              "  Dokument 3 von 3  ")
+    path = tmp_path / "lexis.txt"
+    path.write_bytes(export.encode("utf-8"))
+
+    expected = re.split(r"(.*Do[kc]ument \d+ (von|de|of) \d+.*)", export)[3::3]
+    assert list(iter_documents(path)) == expected
+    assert len(expected) == 4
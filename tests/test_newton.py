@@ -0,0 +1,32 @@
+from mod.newton import ParseNewton
+
+
+def article_table(number, title, text):
+    return ('<table style="margin-top: 15px">'
+            '<tr><td><a name="%d">%s</a></td></tr>'
+            '<tr><td><div class="metadata-item">, Datum: <span>03.05.2021</span></div>'
+            '<div class="metadata-item">, Zdroj: <span>Lidové noviny</span></div>'
+            '<div class="metadata-item">, Autor: <span>Jan Novák</span></div></td></tr>'
+            '<tr><td><div class="article-content">%s</div></td></tr>'
+            '</table>' % (number, title, text))
+
+
+def test_parse_newton(tmp_path):
+    export = ('<html><body><table style="margin-top: 5px"><tr><td>menu</td></tr></table>'
+              + article_table(1, "Energie &amp; klima", "Cena – „vysoká“… &amp;amp;")
+              + '<table style="margin-top: 15px"><tr><td>only one row</td></tr></table>'
+              + article_table(2, "Druhý", "Text €")
+              + '</body></html>')
+    path = tmp_path / "newton.html"
+    path.write_bytes(export.encode("utf-8"))
+
+    parser = ParseNewton(path)
+
+    assert parser.count == 2
+    first, second = parser.articles
+    assert first.title == "Energie & klima"
+    assert first.date == "03/05/2021"
+    assert first.media == "Lidové noviny"
+    assert first.narrator == "Jan Novák"
+    assert first.text == 'Cena - "vysoká"... &'
+    assert second.text == "Text &#8364;"
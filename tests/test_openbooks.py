@@ -0,0 +1,77 @@
+import glob
+import os
+import threading
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from mod.openbooks import traite_url
+from utils.httpcache import HttpCache
+
+FRONTPAGE = """<html><body><ul><li id="link-more-content-sommaire">Sommaire</li></ul>
+<div id="book-more-content-sommaire">%s</div></body></html>"""
+
+CHAPTER = """<html><head>
+<meta name="DC.title" content="Chapitre %(number)s ">
+<meta name="DC.date" content="2020">
+</head><body>
+<div class="name">Jean Dupont</div>
+<div id="citation-chapter-mla"> Dupont, Jean. Chapitre %(number)s. </div>
+<h1 class="title">Chapitre %(number)s</h1>
+<p class="texte">Premier paragraphe<a class="footnotecall" href="#n1">1</a> du chapitre.</p>
+<p class="texte">Second <em>paragraphe</em>.</p>
+<div id="notes"><p><a href="#b1">1</a> Une note.</p></div>
+</body></html>"""
+
+
+class BookHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    requests = Counter()
+    ports = set()
+
+    def do_GET(self):
+        BookHandler.requests[self.path] += 1
+        BookHandler.ports.add(self.client_address[1])
+        if self.path == "/book/100":
+            chapters = "".join('<div class="chapter"><a href="%d">%d</a></div>' % (number, number)
+                               for number in list(range(101, 113)) + [101])
+            body = FRONTPAGE % chapters
+        elif self.path.startswith("/book/1"):
+            body = CHAPTER % {"number": self.path.rsplit("/", 1)[1]}
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_traite_url(tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), BookHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = "http://127.0.0.1:%d/book/100" % server.server_address[1]
+        traite_url(url, str(tmp_path), workers=4,
+                   cache=HttpCache(str(tmp_path / "cache")))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert set(BookHandler.requests.values()) == {1}
+    assert len(BookHandler.requests) == 13
+    # kept alive connections, at most one per worker
+    assert len(BookHandler.ports) <= 4
+
+    assert len(glob.glob(os.path.join(tmp_path, "*.txt"))) == 12
+    assert len(glob.glob(os.path.join(tmp_path, "*.ctx"))) == 12
+    with open(os.path.join(tmp_path, "101Dupont20200101A.txt"), "rb") as file:
+        text = file.read().decode("latin-1")
+    assert text.startswith("Chapitre 101\r\n.\r\n\r\nPremier paragraphe [Une note]  du chapitre.")
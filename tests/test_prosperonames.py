@@ -0,0 +1,76 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import utils.prosperonames
+from utils.prosperonames import suffix, free_name, is_case_sensitive, ProsperoNameAllocator
+
+
+def probed_suffixes(count):
+    """suffixes as the isfile loop of the converters went through them"""
+    index, base = "A", 64
+    result = [index]
+    while len(result) < count:
+        if ord(index[-1]) < 90:
+            index = chr(ord(index[-1]) + 1)
+        else:
+            base += 1
+            index = "A"
+        if base > 64:
+            index = chr(base) + index
+        result.append(index)
+    return result
+
+
+def touch(directory, name):
+    with open(os.path.join(directory, name + ".txt"), "w"):
+        pass
+
+
+def test_suffix():
+    assert [suffix(rank) for rank in range(800)] == probed_suffixes(800)
+
+
+def test_free_name(tmp_path):
+    assert free_name("23/10/2023", "LM", tmp_path) == "LM20231023A"
+    touch(tmp_path, "LM20231023A")
+    touch(tmp_path, "LM20231023B")
+    assert free_name("23/10/2023", "LM", tmp_path) == "LM20231023C"
+
+
+def test_allocator(tmp_path):
+    for name in ("LM20231023A", "LM20231023C", "LM20231024A"):
+        touch(tmp_path, name)
+    allocator = ProsperoNameAllocator(tmp_path)
+    for date in ["23/10/2023"] * 30 + ["24/10/2023"] * 3:
+        name = allocator.name(date, "LM")
+        assert name == free_name(date, "LM", tmp_path)
+        touch(tmp_path, name)
+
+
+def test_allocator_upper_case_extension(tmp_path, monkeypatch):
+    for name in ("LM20231023A.TXT", "LM20231023B.Txt", "LM20231023C.ctx"):
+        with open(os.path.join(tmp_path, name), "w"):
+            pass
+    # as free_name, whatever the filesystem
+    expected = free_name("23/10/2023", "LM", tmp_path)
+    assert ProsperoNameAllocator(tmp_path).name("23/10/2023", "LM") == expected
+
+    monkeypatch.setattr(utils.prosperonames, "is_case_sensitive", lambda directory, names: True)
+    assert ProsperoNameAllocator(tmp_path).name("23/10/2023", "LM") == "LM20231023A"
+    monkeypatch.setattr(utils.prosperonames, "is_case_sensitive", lambda directory, names: False)
+    assert ProsperoNameAllocator(tmp_path).name("23/10/2023", "LM") == "LM20231023C"
+
+
+def test_is_case_sensitive(tmp_path):
+    touch(tmp_path, "LM20231023A")
+    names = set(os.listdir(tmp_path))
+    found_in_other_case = os.path.exists(os.path.join(tmp_path, "lm20231023a.TXT"))
+    assert is_case_sensitive(tmp_path, names) == (not found_in_other_case)
+    assert is_case_sensitive(tmp_path, {"a.txt", "A.TXT"})
+
+
+def test_allocator_threads(tmp_path):
+    allocator = ProsperoNameAllocator(tmp_path)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        names = list(executor.map(lambda _: allocator.name("23/10/2023", "LM"), range(1000)))
+    assert sorted(names) == sorted("LM20231023" + index for index in probed_suffixes(1000))
@@ -0,0 +1,21 @@
+from mod.qp import CrawlAss, CrawlSenat
+from utils.httpclient import Response
+
+
+class RecordingCache:
+    def __init__(self):
+        self.ttls = []
+
+    def request(self, url, data=None, ttl=None):
+        self.ttls.append(ttl)
+        return Response(url, 200, {"content-type": "text/html; charset=utf-8"}, b"")
+
+    def get(self, url, data=None, ttl=None):
+        return self.request(url, data, ttl).body
+
+
+def test_search_listings_revalidated():
+    cache = RecordingCache()
+    CrawlAss("15", "eau", cache)
+    CrawlSenat("eau", "20/06/2017", "23/10/2023", cache)
+    assert cache.ttls == [0, 0]
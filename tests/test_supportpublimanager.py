@@ -1,6 +1,6 @@
 import os.path
 
-from utils.supportpublimanager import SupportPubliManager, parse_publi
+from utils.supportpublimanager import SupportPubliManager, parse_publi, get_support_publi
 
 
 def test_support_publi_manager_init():
@@ -81,3 +81,22 @@ def test_write_support_publi():
     assert len(manager.codex) == len(buf)
 
     os.remove(manager.path)
+
+
+def test_get_support_publi(tmp_path):
+    path = tmp_path / "support.publi"
+    path.write_bytes("Lib\xe9; Libération; Presse nationale; LIB\n".encode('cp1252'))
+
+    manager = get_support_publi(str(path))
+    assert get_support_publi(str(path)) is manager
+    assert manager.codex['Lib\xe9']['abr'] == "LIB"
+
+    path.write_bytes(b"Le Monde; Le Monde; Presse nationale; LM\n")
+    os.utime(path, (0, 0))
+    manager = get_support_publi(str(path))
+    assert list(manager.codex) == ['Le Monde']
+
+    # same mtime, as on a filesystem with coarse timestamps
+    path.write_bytes(b"Le Monde; Le Monde; Presse nationale; LM\nLa Croix; La Croix; Presse nationale; LC\n")
+    os.utime(path, (0, 0))
+    assert list(get_support_publi(str(path)).codex) == ['Le Monde', 'La Croix']
@@ -0,0 +1,16 @@
+from mod.wordreplace import Replacer
+
+
+def test_process():
+    buf = "ta ta,ta-ta tata (ta)\nta".encode('latin-1')
+    for with_marks, expected in ((True, "X X,X-X tata (X)\nX"),
+                                 (False, "X ta,ta-ta tata (ta)\nX")):
+        replacer = Replacer()
+        replacer.set_motif(["X", "ta"], with_marks=with_marks)
+        replacer.set_content(buf)
+        replacer.process(analyse=True)
+        count = replacer.log
+        assert replacer.content == buf.decode('latin-1')
+        replacer.process()
+        assert replacer.content == expected
+        assert replacer.log == count
@@ -1,5 +1,6 @@
 import glob
 import os
+import re
 import shutil
 
 
@@ -14,3 +15,22 @@ def delete_directory(directory):
         return 0
 
     shutil.rmtree(directory)
+
+
+def former_strip_tags_with_class(text):
+    """strip_tags_with_class as it was before the single pass, quadratic,
+    to check that real exports give the same text"""
+    motif = re.compile(r'(<(\S+) class=(.))')
+
+    if not motif.search(text):
+        return text
+
+    while motif.search(text):
+        catches = motif.split(text, 1)
+        to_keep = re.split(f"{catches[3]}>", catches[4], 1)[1]
+        to_keep = re.sub(f"</{catches[2]}>", "", to_keep, 1)
+        text = catches[0] + to_keep
+
+    text = re.sub("</*mark>", "", text)
+
+    return text
@@ -0,0 +1,45 @@
+from sys import intern
+
+
+def interned(value):
+    return intern(value) if isinstance(value, str) else value
+
+
+class Article:
+    """an article parsed from an export, before its Prospero files"""
+    __slots__ = ("title", "date", "time", "media", "narrator", "observations", "text",
+                 "support", "source_type", "root")
+
+    def __init__(self, title=None, date=None, media=None, text=None,
+                 narrator=None, time=None, observations=None):
+        self.title = title
+        self.date = interned(date)
+        self.time = time
+        self.media = interned(media)
+        self.narrator = narrator
+        self.observations = observations
+        self.text = text
+        self.support = None
+        self.source_type = None
+        self.root = None
+
+    def set_support(self, support, source_type, root):
+        self.support = interned(support)
+        self.source_type = interned(source_type)
+        self.root = interned(root)
+
+
+def assign_supports(articles, codex, default_root, clip_abr=False):
+    """support, type and root of each article from the support.publi codex,
+    the root without the last letter of the abbreviation when clip_abr,
+    return the unknown media in order of appearance"""
+    unknowns = {}
+    for article in articles:
+        if article.media in codex:
+            media = codex[article.media]
+            root = media['abr'][:-1] if clip_abr else media['abr']
+            article.set_support(media['source'], media['type'], root)
+        else:
+            unknowns[article.media] = None
+            article.set_support(article.media, 'unknown source', default_root)
+    return list(unknowns)
@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+
+def scan_directory(path):
+    """Return the file names and the subdirectories of a directory, in listing order"""
+    files, directories = [], []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if not is_dir:
+                    files.append(entry.name)
+                elif not entry.is_symlink():
+                    directories.append(entry.path)
+    except OSError:
+        pass
+    return files, directories
+
+
+def iter_files(rep='.', exts=('.txt', '.TXT'), recursive=True, workers=None,
+               snapshot=False):
+    """Yield the paths of files with one of the extensions, in the os.walk order:
+    the files of a directory, then those of each subdirectory.
+    With workers, subdirectories are listed ahead in as many threads;
+    with snapshot, unchanged directories are served from a CorpusSnapshot"""
+    if snapshot:
+        yield from CorpusSnapshot(rep).iter_files(exts, recursive)
+        return
+    if workers and workers > 1 and recursive:
+        yield from iter_files_parallel(rep, exts, workers)
+        return
+
+    stack = [rep]
+    while stack:
+        directory = stack.pop()
+        files, directories = scan_directory(directory)
+        for name in files:
+            if os.path.splitext(name)[1] in exts:
+                yield os.path.join(directory, name)
+        if recursive:
+            stack.extend(reversed(directories))
+
+
+def iter_files_parallel(rep, exts, workers):
+    """iter_files with subdirectories listed by a pool of threads"""
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        stack = [(rep, executor.submit(scan_directory, rep))]
+        while stack:
+            directory, future = stack.pop()
+            files, directories = future.result()
+            stack.extend(reversed([(path, executor.submit(scan_directory, path))
+                                   for path in directories]))
+            for name in files:
+                if os.path.splitext(name)[1] in exts:
+                    yield os.path.join(directory, name)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+# files kept about each corpus, out of it not to change its directories
+STATE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".tiresias_corpora")
+SNAPSHOT_NAME = "snapshot.json"
+
+
+def corpus_state_path(root, name):
+    """Path of a file kept about the corpus of a root directory"""
+    root = os.path.normcase(os.path.abspath(root))
+    key = hashlib.sha1(root.encode('utf-8', 'surrogateescape')).hexdigest()
+    return os.path.join(STATE_DIRECTORY, "%s.%s" % (key, name))
+
+
+def write_state(path, content):
+    """Write a corpus state file through a temporary file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp = path + ".tmp"
+    with open(temp, 'w', encoding='utf-8') as file:
+        file.write(content)
+    os.replace(temp, path)
+
+
+class CorpusSnapshot:
+    """Listing of a corpus tree stored as json in STATE_DIRECTORY,
+    a directory being scanned again only when its mtime has changed.
+    Sizes and mtimes of files are those of the last scan of their directory"""
+
+    def __init__(self, root):
+        self.root = root
+        self.path = corpus_state_path(root, SNAPSHOT_NAME)
+        self.directories = {}
+        self.changed = False
+        self.load()
+
+    def load(self):
+        """Read the snapshot file if any"""
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                self.directories = json.load(file)['directories']
+        except (OSError, ValueError, KeyError):
+            self.directories = {}
+
+    def save(self):
+        """Write the snapshot file, if the state directory is writable"""
+        try:
+            write_state(self.path, json.dumps({'directories': self.directories}))
+        except OSError:
+            pass
+
+    def listing(self, path):
+        """Return the file names and the subdirectories of a directory,
+        from the snapshot if it has not changed"""
+        key = os.path.relpath(path, self.root)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            return [], []
+        entry = self.directories.get(key)
+        if not entry or entry['mtime'] != mtime:
+            entry = self.scan(path, mtime)
+            self.directories[key] = entry
+            self.changed = True
+        return list(entry['files']), [os.path.join(path, name)
+                                      for name in entry['subdirs']]
+
+    @staticmethod
+    def scan(path, mtime):
+        files, subdirs = {}, []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if not is_dir:
+                        try:
+                            stat = entry.stat()
+                            files[entry.name] = [stat.st_size, stat.st_mtime]
+                        except OSError:
+                            files[entry.name] = [None, None]
+                    elif not entry.is_symlink():
+                        subdirs.append(entry.name)
+        except OSError:
+            pass
+        if time.time() - mtime < 2:
+            # could still change within the same mtime, scan again next time
+            mtime = None
+        return {'mtime': mtime, 'files': files, 'subdirs': subdirs}
+
+    def iter_files(self, exts=('.txt', '.TXT'), recursive=True):
+        """iter_files served from the snapshot, saved once the tree is listed"""
+        visited = set()
+        stack = [self.root]
+        while stack:
+            directory = stack.pop()
+            visited.add(os.path.relpath(directory, self.root))
+            files, directories = self.listing(directory)
+            for name in files:
+                if os.path.splitext(name)[1] in exts:
+                    yield os.path.join(directory, name)
+            if recursive:
+                stack.extend(reversed(directories))
+        if recursive and len(visited) < len(self.directories):
+            # forget removed directories
+            self.directories = {key: entry for key, entry in self.directories.items()
+                                if key in visited}
+            self.changed = True
+        if self.changed:
+            self.save()
+            self.changed = False
@@ -0,0 +1,118 @@
+import hashlib
+import http.client
+import json
+import os
+import threading
+import time
+import urllib.error
+
+from utils.httpclient import HttpClient, Response, checked
+
+CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".tiresias_http_cache")
+# seconds a page is served from the cache without asking the server
+DEFAULT_TTL = 24 * 3600
+KEPT_HEADERS = ("content-type", "etag", "last-modified")
+
+
+def write_file(path, content):
+    """write through a temporary file, other threads may read or write it"""
+    temp = "%s.%d.tmp" % (path, threading.get_ident())
+    with open(temp, 'wb') as file:
+        file.write(content)
+    os.replace(temp, path)
+
+
+class HttpCache:
+    """GET and POST responses stored on disk, bodies by their sha256,
+    revalidated with ETag or Last-Modified once older than ttl;
+    offline, or when the server cannot be reached, the stored responses are given"""
+
+    def __init__(self, directory=CACHE_DIRECTORY, ttl=DEFAULT_TTL, offline=False, client=None):
+        self.directory = directory
+        self.ttl = ttl
+        self.offline = offline
+        self.client = client or HttpClient()
+        os.makedirs(os.path.join(directory, "bodies"), exist_ok=True)
+        os.makedirs(os.path.join(directory, "entries"), exist_ok=True)
+
+    def entry_path(self, url, data):
+        request = url.encode("utf-8") + b"\0" + (data or b"")
+        return os.path.join(self.directory, "entries", hashlib.sha256(request).hexdigest() + ".json")
+
+    def body_path(self, digest):
+        return os.path.join(self.directory, "bodies", digest)
+
+    def load(self, url, data):
+        """stored entry and body of a request, None if missing"""
+        try:
+            with open(self.entry_path(url, data), encoding='utf-8') as file:
+                entry = json.load(file)
+            with open(self.body_path(entry['sha256']), 'rb') as file:
+                return entry, file.read()
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def store(self, url, data, entry, body=None):
+        if body is not None:
+            entry['sha256'] = hashlib.sha256(body).hexdigest()
+            if not os.path.exists(self.body_path(entry['sha256'])):
+                write_file(self.body_path(entry['sha256']), body)
+        write_file(self.entry_path(url, data),
+                   json.dumps(entry, sort_keys=True).encode('utf-8'))
+
+    def request(self, url, data=None, ttl=None):
+        """response to a GET, or a POST of data, from the cache when possible"""
+        ttl = self.ttl if ttl is None else ttl
+        cached = self.load(url, data)
+        if cached:
+            entry, body = cached
+            response = Response(url, entry['status'], entry['headers'], body)
+            if self.offline or time.time() - entry['stored'] < ttl:
+                return response
+        elif self.offline:
+            raise urllib.error.URLError("offline and not in cache: %s" % url)
+
+        headers = {}
+        if cached:
+            if 'etag' in entry['headers']:
+                headers['If-None-Match'] = entry['headers']['etag']
+            if 'last-modified' in entry['headers']:
+                headers['If-Modified-Since'] = entry['headers']['last-modified']
+        try:
+            fresh = self.client.request(url, headers, data)
+        except (OSError, http.client.HTTPException):
+            # URLError and connection errors: a stale copy is better than none
+            if cached:
+                return response
+            raise
+
+        if fresh.status == 304 and cached:
+            entry['stored'] = time.time()
+            self.store(url, data, entry)
+            return response
+        if fresh.status == 200:
+            entry = {'url': url,
+                     'status': fresh.status,
+                     'headers': {name: value for name, value in fresh.headers.items()
+                                 if name in KEPT_HEADERS},
+                     'stored': time.time()}
+            # asked again every time and never revalidated, each copy would be a new body
+            if ttl > 0 or 'etag' in entry['headers'] or 'last-modified' in entry['headers']:
+                self.store(url, data, entry, fresh.body)
+        return fresh
+
+    def get(self, url, data=None, ttl=None):
+        """body of a page, HTTPError on an error status"""
+        return checked(self.request(url, data, ttl)).body
+
+
+_caches = {}
+_lock = threading.Lock()
+
+
+def get_http_cache(directory=CACHE_DIRECTORY):
+    """Return the HttpCache shared by the process for a directory"""
+    with _lock:
+        if directory not in _caches:
+            _caches[directory] = HttpCache(directory)
+        return _caches[directory]
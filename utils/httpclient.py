@@ -0,0 +1,126 @@
+import base64
+import email.message
+import http.client
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import namedtuple
+
+USER_AGENT = "Tiresias"
+REDIRECTS = (301, 302, 303, 307, 308)
+
+Response = namedtuple("Response", "url status headers body")
+
+
+class HttpClient:
+    """GET over kept alive connections, one per thread and host"""
+
+    def __init__(self, timeout=30, max_redirects=5, proxies=None):
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        # scheme -> proxy url, from the environment or the system settings as urllib
+        self.proxies = urllib.request.getproxies() if proxies is None else proxies
+        self.local = threading.local()
+
+    def proxy(self, scheme, netloc):
+        """address and headers of the proxy to go through, None to connect directly"""
+        proxy = self.proxies.get(scheme)
+        host = urllib.parse.urlsplit("//" + netloc).hostname or ""
+        if not proxy or urllib.request.proxy_bypass(host):
+            return None
+        if "://" not in proxy:
+            proxy = "http://" + proxy
+        parts = urllib.parse.urlsplit(proxy)
+        headers = {}
+        if parts.username is not None:
+            credentials = "%s:%s" % (urllib.parse.unquote(parts.username),
+                                     urllib.parse.unquote(parts.password or ""))
+            token = base64.b64encode(credentials.encode()).decode("ascii")
+            headers["Proxy-Authorization"] = "Basic " + token
+        return parts.netloc.rpartition("@")[2], headers
+
+    def connection(self, scheme, netloc, proxy=None):
+        connections = self.local.__dict__.setdefault("connections", {})
+        key = (scheme, netloc)
+        if key not in connections:
+            if proxy is None:
+                address = netloc
+            else:
+                address, proxy_headers = proxy
+            if scheme == "https":
+                connection = http.client.HTTPSConnection(address, timeout=self.timeout)
+                if proxy is not None:
+                    # CONNECT through the proxy, TLS with the host itself
+                    connection.set_tunnel(netloc.rpartition("@")[2], headers=proxy_headers)
+            else:
+                connection = http.client.HTTPConnection(address, timeout=self.timeout)
+            connections[key] = connection
+        return connections[key]
+
+    def drop(self, scheme, netloc):
+        connection = self.local.__dict__.get("connections", {}).pop((scheme, netloc), None)
+        if connection:
+            connection.close()
+
+    def send(self, url, headers, data=None):
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        headers = dict({"User-Agent": USER_AGENT, "Accept-Encoding": "identity"}, **headers)
+        if data is not None:
+            headers.setdefault("Content-Type", "application/x-www-form-urlencoded")
+        proxy = self.proxy(parts.scheme, parts.netloc)
+        if proxy is not None and parts.scheme != "https":
+            # a plain http proxy is sent the whole url
+            path = urllib.parse.urlunsplit(parts._replace(fragment=""))
+            headers.update(proxy[1])
+        # a kept alive connection may have been closed by the server
+        for attempt in (1, 2):
+            connection = self.connection(parts.scheme, parts.netloc, proxy)
+            try:
+                connection.request("GET" if data is None else "POST", path, body=data, headers=headers)
+                response = connection.getresponse()
+                body = response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self.drop(parts.scheme, parts.netloc)
+                if attempt == 2:
+                    raise
+                continue
+            if response.will_close:
+                self.drop(parts.scheme, parts.netloc)
+            # header names in lower case
+            return Response(url, response.status,
+                            {name.lower(): value for name, value in response.getheaders()}, body)
+
+    def request(self, url, headers=None, data=None):
+        """response to a GET, or a POST of data, redirections followed, 304 included"""
+        for _ in range(self.max_redirects + 1):
+            response = self.send(url, headers or {}, data)
+            if response.status not in REDIRECTS:
+                return response
+            url = urllib.parse.urljoin(url, response.headers.get("location", ""))
+            if response.status in (301, 302, 303):
+                data = None
+        raise urllib.error.HTTPError(url, response.status, "too many redirections",
+                                     response.headers, None)
+
+    def get(self, url, data=None):
+        """body of a page, HTTPError on an error status"""
+        return checked(self.request(url, data=data)).body
+
+
+def checked(response):
+    if response.status >= 400:
+        raise urllib.error.HTTPError(response.url, response.status,
+                                     http.client.responses.get(response.status, ""),
+                                     response.headers, None)
+    return response
+
+
+def content_charset(response):
+    """charset of the content type header, None if not given"""
+    message = email.message.Message()
+    message["content-type"] = response.headers.get("content-type", "")
+    return message.get_param("charset")
@@ -0,0 +1,74 @@
+import os
+import threading
+
+
+def prospero_date(date):
+    """dd/mm/yyyy to yyyymmdd"""
+    return "".join(reversed(date.split("/")))
+
+
+def suffix(rank):
+    """A to Z, then AA to AZ, BA to BZ..."""
+    if rank < 26:
+        return chr(65 + rank)
+    return chr(64 + rank // 26) + chr(65 + rank % 26)
+
+
+def free_name(date, prefix, directory):
+    """first prefix + date + suffix without a .txt in directory"""
+    stem = prefix + prospero_date(date)
+    rank = 0
+    while os.path.isfile(os.path.join(directory, stem + suffix(rank) + ".txt")):
+        rank += 1
+    return stem + suffix(rank)
+
+
+def is_case_sensitive(directory, names):
+    """True if the file names of a directory differing only by case are
+    different files, as on most Linux filesystems, guessed from its entries"""
+    for name in names:
+        other = name.swapcase()
+        if other != name:
+            return other in names or not os.path.exists(os.path.join(directory, other))
+    return True
+
+
+class ProsperoNameAllocator:
+    """free_name for the writers of a run, the directory being listed once;
+    where case does not matter, as on Windows and macOS, A.TXT takes the name
+    A as it does for isfile"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.taken = None
+        self.key = None
+        self.ranks = {}
+        self.lock = threading.Lock()
+
+    def scan(self):
+        files = set()
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        files.add(entry.name)
+        except FileNotFoundError:
+            pass
+        if is_case_sensitive(self.directory, files):
+            self.key = str
+        else:
+            self.key = str.lower
+        return {self.key(name)[:-4] for name in files if self.key(name).endswith(".txt")}
+
+    def name(self, date, prefix):
+        stem = prefix + prospero_date(date)
+        with self.lock:
+            if self.taken is None:
+                self.taken = self.scan()
+            rank = self.ranks.get(stem, 0)
+            while self.key(stem + suffix(rank)) in self.taken:
+                rank += 1
+            name = stem + suffix(rank)
+            self.taken.add(self.key(name))
+            self.ranks[stem] = rank + 1
+        return name
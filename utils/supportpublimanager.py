@@ -2,9 +2,13 @@ import os
 import re
 
 
-def read_publi_file():
+def find_publi_file():
     path = "data/support.publi"
-    path = path if os.path.isfile(path) else "../data/support.publi"
+    return path if os.path.isfile(path) else "../data/support.publi"
+
+
+def read_publi_file(path=None):
+    path = path or find_publi_file()
 
     with open(path, 'rb') as handle:
         buf = (handle.read().decode('cp1252'))
@@ -39,12 +43,12 @@ def parse_publi(publi_content):
 class SupportPubliManager:
     """Deal with support.publi"""
 
-    def __init__(self):
+    def __init__(self, path=None):
         self.path = None
         self.codex = {}
         self.sources = {}
 
-        buf, self.path = read_publi_file()
+        buf, self.path = read_publi_file(path)
         self.codex, self.sources = parse_publi(buf)
 
     def add(self, entry, source, typ, abbr):
@@ -83,3 +87,20 @@ class SupportPubliManager:
                              candidat[1],
                              candidat[2],
                              candidat[3])
+
+
+# {absolute path: ((mtime in ns, size), SupportPubliManager)}
+_managers = {}
+
+
+def get_support_publi(path=None):
+    """Return the SupportPubliManager shared by the process,
+    parsed again only when the file has changed: the size tells
+    an edit within the same tick of a coarse mtime"""
+    path = os.path.abspath(path or find_publi_file())
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _managers.get(path)
+    if cached is None or cached[0] != version:
+        cached = _managers[path] = (version, SupportPubliManager(path))
+    return cached[1]
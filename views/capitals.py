@@ -6,6 +6,8 @@ import os
 import re
 from pathlib import Path
 
+from utils.corpuswalker import iter_files
+
 accents = ["à", "á", "â", "ã", "ä", "å", "æ", "ã", "ç",
            "è", "é", "ê", "ë",
            "ì", "í", "î", "ï", "ĩ",
@@ -210,12 +212,7 @@ class ViewCap:
         self.chosen_prc.set(directory)
         self.result.delete(1.0, tk.END)
 
-        self.list_txt = []
-        for root, rep, files in os.walk(directory):
-            self.list_txt.extend([os.path.join(root, name)
-                                  for name in files
-                                  if os.path.splitext(name)[1] in [".txt", ".TXT"]
-                                  ])
+        self.list_txt = list(iter_files(directory, snapshot=True))
 
         self.result.insert(1.0,
                            "Found %d .txt(s) in %s\n"
@@ -3,14 +3,22 @@ Josquin Debaz
 GPL3
 """
 
+import os
 import tkinter as tk
 from tkinter import ttk
 from tkinter import filedialog
 from tkinter.scrolledtext import ScrolledText
 from threading import Thread
+from concurrent.futures import ProcessPoolExecutor, wait
 
 from mod.cleaning import list_files
-from mod.cleaning import Cleaner
+from mod.cleaning import clean_file, clean_files
+from mod.cleaning import CleaningManifest
+
+# files sent to a worker at once
+BATCH_SIZE = 64
+# seconds between two refreshes of the window while waiting for a worker
+POLL_INTERVAL = 0.05
 
 
 class ViewCleaning:
@@ -19,6 +27,7 @@ class ViewCleaning:
     def __init__(self, parent):
         self._thread = None
         self.query = None
+        self.manifest = None
         self.parent = parent
         window_title = tk.Label(parent,
                                 text="Character Cleaning",
@@ -55,6 +64,22 @@ class ViewCleaning:
         # bn_test.select()
         bn_test.pack(side=tk.LEFT)
 
+        self.force = tk.BooleanVar()
+        bn_force = tk.Checkbutton(fr1,
+                                  text='force',
+                                  variable=self.force)
+        bn_force.pack(side=tk.LEFT)
+
+        tk.Label(fr1, text="workers").pack(side=tk.LEFT)
+        self.workers = tk.IntVar()
+        sp_workers = tk.Spinbox(fr1,
+                                from_=1,
+                                to=64,
+                                width=3,
+                                textvariable=self.workers)
+        self.workers.set(os.cpu_count() or 1)
+        sp_workers.pack(side=tk.LEFT)
+
         button_action = tk.Button(fr1,
                                   text="Process cleaning",
                                   command=self.t_action)
@@ -147,7 +172,7 @@ class ViewCleaning:
 
         self._thread = Thread(target=self.list_txt)
         self._thread.start()
-        while not self.query:
+        while self._thread.is_alive():
             self.parent.update()
         self._thread = None
 
@@ -161,22 +186,25 @@ class ViewCleaning:
                                    "Processing text cleaning\n")
             self.progressbar['mode'] = 'determinate'
             self.progressbar['maximum'] = len(self.query)
-            n = 0
-            for c, txt in enumerate(self.query):
-                n += self.clean_txt(txt)
-                self.progressbar['value'] = c
-                self.parent.update()
-                self.result.see("end")
+            options = self.get_options()
+            if self.workers.get() > 1:
+                n = self.clean_parallel(options)
+            else:
+                n = 0
+                for c, txt in enumerate(self.query):
+                    n += self.clean_txt(txt, options)
+                    self.progressbar['value'] = c
+                    self.parent.update()
+                    self.result.see("end")
+            if not self.test.get():
+                self.manifest.save()
 
             self.result.insert("end", "%d file(s) cleaned\n" % n)
 
         else:
             self.result.insert("end", "Nothing found\n")
 
-    def clean_txt(self, txt):
-        with open(txt, 'rb') as f:
-            b = f.read()
-
+    def get_options(self):
         options = ""
         if self.utf.get():
             options += "u"
@@ -198,21 +226,43 @@ class ViewCleaning:
             options += "d"
         if self.footnotes.get():
             options += "f"
+        return options
+
+    def clean_parallel(self, options):
+        """clean batches of files in worker processes,
+        logging results in the listing order"""
+        n = 0
+        done = 0
+        batches = [self.query[i:i + BATCH_SIZE]
+                   for i in range(0, len(self.query), BATCH_SIZE)]
+        with ProcessPoolExecutor(max_workers=self.workers.get()) as executor:
+            futures = [executor.submit(clean_files, batch, options, self.test.get())
+                       for batch in batches]
+            for future in futures:
+                # keep the window alive without taking a core from the workers
+                while not wait([future], timeout=POLL_INTERVAL).done:
+                    self.parent.update()
+                for txt, log, fingerprint in future.result():
+                    n += self.log_file(txt, log, fingerprint)
+                    done += 1
+                self.progressbar['value'] = done
+                self.parent.update()
+                self.result.see("end")
+        return n
 
-        c = Cleaner(b, options)
+    def clean_txt(self, txt, options):
+        log, fingerprint = clean_file(txt, options, self.test.get())
+        return self.log_file(txt, log, fingerprint)
 
-        if not set([x for x in c.log.values()]) == {0}:
-            # if something has to be corrected
+    def log_file(self, txt, log, fingerprint):
+        """write corrections made on a file, return 1 if any"""
+        if fingerprint:
+            self.manifest.record(txt, fingerprint)
+        if log:
             self.result.insert("end", "%s  " % txt)
             self.result.insert("end",
                                "%s\n" % "; ".join(["%s: %s" % (x, y)
-                                                   for x, y in c.log.items()
-                                                   if y != 0]))
-            if not self.test.get():
-                # if not in test mode
-                buf = bytes(c.content, 'latin-1')
-                with open(txt, 'wb') as f:
-                    f.write(buf)
+                                                   for x, y in log.items()]))
             return 1
         else:
             return 0
@@ -226,8 +276,11 @@ class ViewCleaning:
         if rep == '':
             self.result.insert("end", "No directory selected")
         else:
+            self.manifest = CleaningManifest(rep, self.get_options())
             self.query = list_files(rep=rep,
-                                    recursive=self.is_recursive.get())
+                                    recursive=self.is_recursive.get(),
+                                    manifest=None if self.force.get() else self.manifest,
+                                    snapshot=True)
         self.progressbar.stop()
 
     def sel_dir(self):
@@ -1,9 +1,14 @@
 import tkinter as tk
 from tkinter import ttk
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, wait
 
 from mod.europresse import *
-from utils.supportpublimanager import SupportPubliManager
+from utils.supportpublimanager import get_support_publi
+from utils.prosperonames import ProsperoNameAllocator
+
+# seconds between two refreshes of the window while waiting for a worker
+POLL_INTERVAL = 0.05
 
 
 class ViewEuropresse:
@@ -64,6 +69,18 @@ class ViewEuropresse:
                               command=self.analyse)
         bn_test_f.pack(anchor=tk.W)
 
+        fr_workers = tk.Frame(fr_eur_f)
+        fr_workers.pack(anchor=tk.W)
+        tk.Label(fr_workers, text="workers").pack(side=tk.LEFT)
+        self.workers = tk.IntVar()
+        sp_workers = tk.Spinbox(fr_workers,
+                                from_=1,
+                                to=64,
+                                width=3,
+                                textvariable=self.workers)
+        self.workers.set(os.cpu_count() or 1)
+        sp_workers.pack(side=tk.LEFT)
+
         # Unknown sources
         fr_u = tk.LabelFrame(fr_eur_f, text="Unknown Sources", borderwidth=2, )
         fr_u.pack(side=tk.LEFT, anchor=tk.N)
@@ -225,25 +242,42 @@ class ViewEuropresse:
     def analyse(self):
         self.reset_lists()
 
-        self.Supports = SupportPubliManager()
+        self.Supports = get_support_publi()
         self.populate_supports()
 
         unknowns = []
+        known_unknowns = set()
+        seen = set()
         self.articles_list = []
-        for c in self.htm_list.curselection():
-            f = self.list_html[c]
+        selection = [self.list_html[c] for c in self.htm_list.curselection()]
+        self.progressbar['value'] = 0
+        self.progressbar['maximum'] = len(selection)
+        if self.workers.get() > 1 and len(selection) > 1:
+            exports = self.parse_parallel(selection)
+        else:
+            exports = self.parse_sequential(selection)
+
+        for f, articles in exports:
             self.log.insert(1.0, 'Analysing %s\n' % f)
-            try:
-                path = os.path.join(self.html_directory, f)
-                html_parser = EuropresseHtmlParser(path)
-                for a in html_parser.parsed_articles:
-                    if a not in self.articles_list:
-                        self.articles_list.append(a)
-                    if (a['source'] not in self.Supports.codex.keys() and
-                            a['source'] not in unknowns):
-                        unknowns.append(a['source'])
-            except:
+            self.progressbar['value'] += 1
+            self.parent.update()
+            if articles is None:
                 self.log.insert(1.0, 'Analyse problem\n')
+                continue
+            duplicates = 0
+            for a in articles:
+                key = article_fingerprint(a)
+                if key in seen:
+                    duplicates += 1
+                else:
+                    seen.add(key)
+                    self.articles_list.append(a)
+                if (a['source'] not in self.Supports.codex and
+                        a['source'] not in known_unknowns):
+                    known_unknowns.add(a['source'])
+                    unknowns.append(a['source'])
+            if duplicates:
+                self.log.insert(1.0, '%d duplicate(s) dropped from %s\n' % (duplicates, f))
 
         self.log.insert(1.0, f'Found {len(self.articles_list):d} compatible articles and {len(unknowns):d} unknown '
                              f'source(s)\n')
@@ -254,6 +288,25 @@ class ViewEuropresse:
 
         self.art_list.select_set(0, "end")
 
+    def parse_sequential(self, selection):
+        """yield each export with its articles, None if it is broken"""
+        for f in selection:
+            yield f, try_parse_export(os.path.join(self.html_directory, f))
+
+    def parse_parallel(self, selection):
+        """parse exports in worker processes, yielding them in the selection order"""
+        with ProcessPoolExecutor(max_workers=self.workers.get()) as executor:
+            futures = [executor.submit(try_parse_export, os.path.join(self.html_directory, f))
+                       for f in selection]
+            for f, future in zip(selection, futures):
+                while not wait([future], timeout=POLL_INTERVAL).done:
+                    self.parent.update()
+                try:
+                    articles = future.result()
+                except:
+                    articles = None
+                yield f, articles
+
     def sel_dir_w(self):
         memory_selected_articles = self.art_list.curselection()
         self.chosen_dir_w.set("")
@@ -275,10 +328,12 @@ class ViewEuropresse:
             if not directory:
                 self.log.insert(1.0, 'No directory for Prospero files\n')
             else:
+                allocator = ProsperoNameAllocator(directory)
                 for count, article_index in enumerate(selected_articles):
                     article = self.articles_list[article_index]
                     writer = EuropresseProsperoFileWriter(article,
                                                           directory,
-                                                          self.CleaningVal.get())
+                                                          self.CleaningVal.get(),
+                                                          allocator)
                     self.log.insert(1.0, 'Writing %s\n' % writer.filename)
                     self.progressbar['value'] = count + 1
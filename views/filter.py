@@ -5,6 +5,7 @@ import os
 from pathlib import Path
 
 from mod.prcfilter import PrcFilter
+from utils.corpuswalker import iter_files
 
 
 class ViewFilter:
@@ -166,11 +167,8 @@ class ViewFilter:
         self.result.delete(1.0, "end")
 
         self.list_txt = []
-        for root, rep, files in os.walk(directory):
-            self.list_txt.extend(
-                [os.path.join(root, name) for name in files if os.path.splitext(name)[1] in [".txt", ".TXT"]])
-
-        for txt in self.list_txt:
+        for txt in iter_files(directory, snapshot=True):
+            self.list_txt.append(txt)
             self.Corpus_list.insert("end", u"%s\n" % txt)
         self.result.insert(1.0,
                            u"Found %d .txt(s) in %s\n" % (len(self.list_txt), directory))
@@ -111,7 +111,8 @@ class ViewListTxt:
                                    [".txt", ".TXT"],
                                    self.Recursive.get(),
                                    slash,
-                                   repl)
+                                   repl,
+                                   snapshot=True)
 
                 if len(query) > 0:
                     self.result.insert(1.0, "\n".join(query))
@@ -4,6 +4,7 @@ from tkinter import filedialog as fd
 from tkinter.scrolledtext import ScrolledText
 
 from mod.openbooks import traite_url
+from utils.httpcache import DEFAULT_TTL, HttpCache
 
 
 class ViewOpenbooks:
@@ -48,6 +49,22 @@ class ViewOpenbooks:
         #        Bn_Cleaning.pack(side=tk.LEFT)
         bn_process = tk.Button(fr3, text="Process", command=self.process)
         bn_process.pack(side=tk.LEFT)
+        tk.Label(fr3, text="cache hours").pack(side=tk.LEFT)
+        self.cache_hours = tk.IntVar()
+        sp_cache = tk.Spinbox(fr3,
+                              from_=0,
+                              to=720,
+                              width=4,
+                              textvariable=self.cache_hours)
+        self.cache_hours.set(DEFAULT_TTL // 3600)
+        sp_cache.pack(side=tk.LEFT)
+        self.OfflineVal = tk.BooleanVar()
+        bn_offline = tk.Checkbutton(fr3,
+                                    text="offline",
+                                    variable=self.OfflineVal)
+        bn_offline.pack(side=tk.LEFT)
+        # settings of this view only, other crawlers keep the shared cache
+        self.cache = HttpCache()
 
         # Frame 4
         fr4 = tk.Frame(self.parent)
@@ -67,6 +84,8 @@ class ViewOpenbooks:
         self.choosenDir.set(dir)
 
     def process(self):
+        if not self.set_cache():
+            return
         url = self.choosen_url.get()
         if url:
             save_dir = self.choosenDir.get()
@@ -74,7 +93,7 @@ class ViewOpenbooks:
                 save_dir = os.getcwd()
             self.log.insert(1.0, "Processing %s to %s\n" % (url, save_dir))
             self.parent.update()
-            traite_url(url, save_dir)
+            traite_url(url, save_dir, cache=self.cache)
             #            self.log.insert(1.0,
             #                            "%s: found %d article(s)\n"%(filename,
             #                                                       len(parse.content)))
@@ -88,3 +107,17 @@ class ViewOpenbooks:
             self.parent.update()
         else:
             self.log.insert(1.0, "Missing URL to process\n")
+
+    def set_cache(self):
+        """pages younger than the cache hours are not fetched again, none at all offline;
+        False when the cache hours are not a number"""
+        try:
+            hours = self.cache_hours.get()
+        except tk.TclError:
+            hours = -1
+        if hours < 0:
+            self.log.insert(1.0, "Cache hours must be a whole number\n")
+            return False
+        self.cache.ttl = hours * 3600
+        self.cache.offline = self.OfflineVal.get()
+        return True
@@ -7,7 +7,8 @@ import webbrowser
 import time
 
 from mod.qp import *
-from mod.cleaning import Cleaner
+from mod.cleaning import get_pipeline
+from utils.httpcache import DEFAULT_TTL, HttpCache
 
 
 class ViewQP:
@@ -118,6 +119,22 @@ class ViewQP:
                                      variable=self.CleaningVal)
         bn_cleaning.select()
         bn_cleaning.pack(side=tk.LEFT)
+        tk.Label(fr3, text="cache hours").pack(side=tk.LEFT)
+        self.cache_hours = tk.IntVar()
+        sp_cache = tk.Spinbox(fr3,
+                              from_=0,
+                              to=720,
+                              width=4,
+                              textvariable=self.cache_hours)
+        self.cache_hours.set(DEFAULT_TTL // 3600)
+        sp_cache.pack(side=tk.LEFT)
+        self.OfflineVal = tk.BooleanVar()
+        bn_offline = tk.Checkbutton(fr3,
+                                    text="offline",
+                                    variable=self.OfflineVal)
+        bn_offline.pack(side=tk.LEFT)
+        # settings of this view only, other crawlers keep the shared cache
+        self.cache = HttpCache()
 
         bn_process = tk.Button(fr3,
                                text="Process selected questions",
@@ -136,6 +153,8 @@ class ViewQP:
         self.choosenDir.set(dir)
 
     def search(self):
+        if not self.set_cache():
+            return
         kw = self.KW_entry.get()
         senat_from = self.entrFrom.get()
         senat_to = self.entrTo.get()
@@ -157,7 +176,7 @@ class ViewQP:
         self.log.insert(1.0,
                         f"Searching for [{kw}] in Sénat DB from {f} to {t})")
         self.parent.update()
-        senat_crawler = CrawlSenat(kw, f, t)
+        senat_crawler = CrawlSenat(kw, f, t, self.cache)
         self.log.insert(1.0, "Found %s question(s)\n" % len(senat_crawler.dicQ))
         self.SenatListQ = []
         for k, e in senat_crawler.dicQ.items():
@@ -182,7 +201,7 @@ class ViewQP:
             self.log.insert(1.0,
                             f"Searching for [{kw}] in Assemblée DB for legislation {leg}\n")
             self.parent.update()
-            ass_crawler = CrawlAss(leg, kw)
+            ass_crawler = CrawlAss(leg, kw, self.cache)
             self.log.insert(1.0, "Found %s question(s)\n" % len(ass_crawler.dicQ))
             for k in sorted(ass_crawler.dicQ.keys(),
                             key=lambda x: time.strptime(ass_crawler.dicQ[x]['date'], "%d/%m/%Y")):
@@ -203,6 +222,8 @@ class ViewQP:
             webbrowser.open(url, 0, True)
 
     def process(self):
+        if not self.set_cache():
+            return
         self.progressbar['mode'] = 'determinate'
         destination = self.choosenDir.get()
         cl = self.CleaningVal.get()
@@ -215,7 +236,7 @@ class ViewQP:
                     q = self.SenatListQ[c]
                     self.log.insert(1.0,
                                     "Processing question %s\n" % q)
-                    pq = QuestionParlementaire(self.dicQ[q]['url'])
+                    pq = QuestionParlementaire(self.dicQ[q]['url'], self.cache)
                     pq.retreive()
 
                     if cl:
@@ -235,7 +256,7 @@ class ViewQP:
                     q = self.AssListQ[c]
                     self.log.insert(1.0,
                                     "Processing question %s\n" % q)
-                    pq = QuestionParlementaire(self.dicQ[q]['url'])
+                    pq = QuestionParlementaire(self.dicQ[q]['url'], self.cache)
                     pq.retreive()
 
                     if cl:
@@ -254,6 +275,19 @@ class ViewQP:
             self.log.insert(1.0, "Need a destination directory\n")
 
     def clean(self, text):
-        text = text.encode('latin-1', 'xmlcharrefreplace')  # to bytes
-        c = Cleaner(text)
+        c = get_pipeline().clean(text)
         return c.content
+
+    def set_cache(self):
+        """pages younger than the cache hours are not fetched again, none at all offline;
+        False when the cache hours are not a number"""
+        try:
+            hours = self.cache_hours.get()
+        except tk.TclError:
+            hours = -1
+        if hours < 0:
+            self.log.insert(1.0, "Cache hours must be a whole number\n")
+            return False
+        self.cache.ttl = hours * 3600
+        self.cache.offline = self.OfflineVal.get()
+        return True
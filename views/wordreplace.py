@@ -173,7 +173,7 @@ class ViewReplacer:
                 to_from.extend(to_replace)
                 self.history_add(to_from)
 
-                text_list = list_files(folder, recursive=self.Recursive.get())
+                text_list = list_files(folder, recursive=self.Recursive.get(), snapshot=True)
                 self.result.insert(1.0,
                                    "Found %d .txt file(s)\n" % len(text_list))
                 self.progressbar['value'] = 0
@@ -188,7 +188,7 @@ class ViewReplacer:
                     with open(txt, 'rb') as f:
                         buf = f.read()
                     processor.set_content(buf)
-                    processor.process()
+                    processor.process(analyse=self.test.get())
                     if processor.log:
                         if not self.test.get():
                             buf = bytes(processor.content, 'latin-1')